@@ -3,7 +3,7 @@ import subprocess
 import importlib
 
 # --- Auto-install required packages ---
-required = ["selenium", "openpyxl", "requests", "bs4", "geopy"]
+required = ["selenium", "openpyxl", "requests", "bs4", "psutil", "numpy"]
 for package in required:
     try:
         importlib.import_module(package)
@@ -14,7 +14,8 @@ for package in required:
 import os
 import time
 import re
-from urllib.parse import quote_plus, urlencode
+from urllib.parse import quote_plus, urlencode, urlparse, parse_qs
+from html import unescape
 import requests
 from bs4 import BeautifulSoup
 from selenium import webdriver
@@ -31,16 +32,27 @@ from openpyxl.styles import Alignment, PatternFill
 from openpyxl.styles.borders import Border, Side
 import json
 from copy import copy
+from dataclasses import dataclass, field
 from openpyxl.utils import get_column_letter
 import logging
 from selenium.webdriver.remote.remote_connection import LOGGER
 from datetime import datetime, timedelta
-from geopy.distance import geodesic
 import csv
 from io import StringIO
-from datetime import datetime, date
+from datetime import datetime, date, timezone
 from math import radians, cos, sin, asin, sqrt
 import random
+import atexit
+import functools
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+import psutil
+import sqlite3
+import gzip
+import hashlib
+from collections import OrderedDict
+import numpy as np
 
 # Suppress Selenium logging
 LOGGER.setLevel(logging.WARNING)
@@ -62,61 +74,919 @@ _REDFIN_HEADERS = {
     "Cache-Control": "no-cache"
 }
 
-# Create a session for persistent cookies
-session = requests.Session()
-session.headers.update(_REDFIN_HEADERS)
 
+# ── Shared HTTP client ────────────────────────────────────────
+# Every plain-HTTP call in the module goes through ``http`` so connections are
+# kept alive per host, per-host rate limits are honoured across threads, and
+# throttling / transient server errors are retried with backoff.
+HTTP_POOL_SIZE = int(os.environ.get("AUTOFILL_HTTP_POOL_SIZE", "10"))
+HTTP_MAX_RETRIES = int(os.environ.get("AUTOFILL_HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF = float(os.environ.get("AUTOFILL_HTTP_BACKOFF", "0.5"))
+HTTP_BACKOFF_CAP = 30.0
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Site base URLs (overridable, e.g. to point a benchmark at a local stand-in)
+REDFIN_BASE_URL = os.environ.get("AUTOFILL_REDFIN_URL", "https://www.redfin.com").rstrip("/")
+ZILLOW_BASE_URL = os.environ.get("AUTOFILL_ZILLOW_URL", "https://www.zillow.com").rstrip("/")
+
+# Requests per second and burst size per host; hosts not listed are not limited.
+# Nominatim's usage policy allows at most one request per second.
+HOST_RATE_LIMITS = {
+    "nominatim.openstreetmap.org": (1.0, 1),
+    "geocoding.geo.census.gov": (5.0, 5),
+    "www.redfin.com": (2.0, 4),
+    "html.duckduckgo.com": (1.0, 2),
+}
 
-def get_coordinates_from_address(address: str) -> tuple:
-    """Get lat/lng coordinates from address using multiple methods with caching"""
+# Default headers per host (merged under any headers passed with a request)
+_DEFAULT_HTTP_HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; PropertyComps/1.0)"}
+HOST_HEADERS = {
+    "www.redfin.com": _REDFIN_HEADERS,
+}
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``acquire`` blocks until a request may go out"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping as needed; returns the seconds waited"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = max(-self._tokens / self.rate, self._blocked_until - now, 0.0)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def defer(self, seconds: float):
+        """Hold every caller back for ``seconds`` (server asked us to slow down)"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+def _retry_after_seconds(response) -> float | None:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
     try:
-        clean_address = address.strip()
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+class HttpClient:
+    """Per-host keep-alive sessions with rate limiting, retries and metrics.
+
+    Mirrors the ``requests`` call style (``http.get(url, params=..., timeout=...)``)
+    and returns the final ``requests.Response``; connection errors are raised
+    only once the retries are used up.
+    """
+
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, max_retries: int = HTTP_MAX_RETRIES,
+                 backoff: float = HTTP_BACKOFF, rate_limits: dict | None = None,
+                 host_headers: dict | None = None):
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.rate_limits = dict(HOST_RATE_LIMITS if rate_limits is None else rate_limits)
+        self.host_headers = dict(HOST_HEADERS if host_headers is None else host_headers)
+        self._sessions = {}
+        self._buckets = {}
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def session_for(self, host: str) -> requests.Session:
+        with self._lock:
+            sess = self._sessions.get(host)
+            if sess is None:
+                sess = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                sess.mount("http://", adapter)
+                sess.mount("https://", adapter)
+                sess.headers.update(self.host_headers.get(host, _DEFAULT_HTTP_HEADERS))
+                self._sessions[host] = sess
+                rate = self.rate_limits.get(host)
+                if rate:
+                    self._buckets[host] = TokenBucket(*rate)
+                self._metrics[host] = {"requests": 0, "retries": 0, "errors": 0, "statuses": {},
+                                       "latency_s": 0.0, "throttled_s": 0.0}
+            return sess
+
+    def _backoff_delay(self, attempt: int, response=None) -> float:
+        if response is not None:
+            retry_after = _retry_after_seconds(response)
+            if retry_after is not None:
+                return min(retry_after, HTTP_BACKOFF_CAP)
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(HTTP_BACKOFF_CAP, self.backoff * (2 ** attempt)))
+
+    def request(self, method: str, url: str, retries: int | None = None, **kwargs) -> requests.Response:
+        if snapshot_archive.replaying:
+            return snapshot_archive.replay_response(method, url, kwargs)
+        host = urlparse(url).hostname or ""
+        sess = self.session_for(host)
+        bucket = self._buckets.get(host)
+        metrics = self._metrics[host]
+        retries = self.max_retries if retries is None else retries
+
+        for attempt in range(retries + 1):
+            if bucket is not None:
+                waited = bucket.acquire()
+                with self._lock:
+                    metrics["throttled_s"] += waited
+            start = time.monotonic()
+            try:
+                response = sess.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                with self._lock:
+                    metrics["requests"] += 1
+                    metrics["errors"] += 1
+                    metrics["latency_s"] += time.monotonic() - start
+                if attempt >= retries:
+                    raise
+                with self._lock:
+                    metrics["retries"] += 1
+                time.sleep(self._backoff_delay(attempt))
+                continue
+
+            with self._lock:
+                metrics["requests"] += 1
+                metrics["latency_s"] += time.monotonic() - start
+                metrics["statuses"][response.status_code] = metrics["statuses"].get(response.status_code, 0) + 1
+            if response.status_code not in _RETRY_STATUSES or attempt >= retries:
+                if snapshot_archive.recording:
+                    snapshot_archive.record_response(method, url, kwargs, response)
+                return response
+
+            delay = self._backoff_delay(attempt, response)
+            if bucket is not None and response.status_code == 429:
+                bucket.defer(delay)
+            with self._lock:
+                metrics["retries"] += 1
+            time.sleep(delay)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            out = {}
+            for host, m in self._metrics.items():
+                out[host] = {
+                    "requests": m["requests"],
+                    "retries": m["retries"],
+                    "errors": m["errors"],
+                    "statuses": dict(m["statuses"]),
+                    "avg_ms": round(m["latency_s"] * 1000 / m["requests"], 1) if m["requests"] else 0.0,
+                    "throttled_s": round(m["throttled_s"], 2),
+                }
+            return out
+
+    def close(self):
+        with self._lock:
+            for sess in self._sessions.values():
+                sess.close()
+            self._sessions.clear()
+
+
+http = HttpClient()
+atexit.register(http.close)
+
+
+# ── Shared Chrome driver pool ─────────────────────────────────
+_CHROME_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Pool sizing / recycling limits (overridable through the environment)
+DRIVER_POOL_SIZE = int(os.environ.get("AUTOFILL_DRIVER_POOL_SIZE", "3"))
+DRIVER_MAX_PAGES = int(os.environ.get("AUTOFILL_DRIVER_MAX_PAGES", "40"))
+DRIVER_MAX_RSS_MB = int(os.environ.get("AUTOFILL_DRIVER_MAX_RSS_MB", "1500"))
+
+
+def build_chrome_options() -> Options:
+    """Headless Chrome options shared by every scraping stage"""
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-logging")
+    options.add_argument("--log-level=3")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    options.add_argument(f"--user-agent={_CHROME_USER_AGENT}")
+    # Network events for wait_for_network_idle()
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+class PooledDriver:
+    """Thin wrapper around a Chrome WebDriver that counts page loads and the origins it visited"""
+
+    def __init__(self, driver):
+        self._driver = driver
+        self.pages = 0
+        self.requested_url = None
+        self.origins = set()
+
+    def get(self, url):
+        self.pages += 1
+        self.requested_url = url
+        parsed = urlparse(url)
+        if parsed.scheme in ("http", "https"):
+            self.origins.add(f"{parsed.scheme}://{parsed.netloc}")
+        pacing.wait(url)
+        return self._driver.get(url)
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+class DriverPool:
+    """Lease warm, pre-configured Chrome drivers to the scraping stages.
+
+    Drivers are reset between leases, recycled after ``max_pages`` page loads
+    or once Chrome's resident memory grows past ``max_rss_mb``, and all of them
+    are shut down at interpreter exit.
+    """
 
-        # Method 1: Try using Nominatim (OpenStreetMap)
-        print("🔄 Using Nominatim geocoding service...")
+    def __init__(self, max_drivers: int = DRIVER_POOL_SIZE, max_pages: int = DRIVER_MAX_PAGES,
+                 max_rss_mb: int = DRIVER_MAX_RSS_MB):
+        self.max_drivers = max(1, max_drivers)
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self._cond = threading.Condition()
+        self._idle = []
+        self._drivers = set()  # every live driver, idle or leased
+        self._live = 0
+        self._closed = False
+        self.stats = {"launches": 0, "leases": 0, "recycled": 0}
+
+    def _launch(self) -> PooledDriver:
+        print("🌐 Launching pooled Chrome driver...")
+        driver = webdriver.Chrome(service=ChromeService(), options=build_chrome_options())
         try:
-            nominatim_url = f"https://nominatim.openstreetmap.org/search?q={quote_plus(clean_address)}&format=json&limit=1&countrycodes=us"
-            headers = {'User-Agent': 'Mozilla/5.0 (compatible; PropertyComps/1.0)'}
-
-            response = requests.get(nominatim_url, headers=headers, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                if data:
-                    lat = float(data[0]['lat'])
-                    lng = float(data[0]['lon'])
-                    print(f"✅ Found coordinates via Nominatim: {lat}, {lng}")
-                    return lat, lng
-        except Exception as e:
-            print(f"⚠️ Nominatim geocoding failed: {e}")
+            # Applied to every new document, so it survives navigation
+            driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+                "source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+            })
+        except Exception:
+            pass
+        pooled = PooledDriver(driver)
+        with self._cond:
+            self.stats["launches"] += 1
+            self._drivers.add(pooled)
+        return pooled
+
+    def acquire(self) -> PooledDriver:
+        """Lease a driver, launching a new one if the pool is not yet full"""
+        if snapshot_archive.replaying:
+            raise RuntimeError("Browser disabled in replay mode")
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Driver pool is shut down")
+                if self._idle:
+                    driver = self._idle.pop()
+                    break
+                if self._live < self.max_drivers:
+                    self._live += 1
+                    driver = None
+                    break
+                self._cond.wait()
+            self.stats["leases"] += 1
 
-        # Method 2: Try Census Geocoding Service
-        print("🔄 Trying Census geocoding service...")
+        if driver is None:
+            try:
+                driver = self._launch()
+            except Exception:
+                with self._cond:
+                    self._live -= 1
+                    self._cond.notify()
+                raise
+        return driver
+
+    def release(self, driver: PooledDriver):
+        """Return a leased driver, resetting or recycling it as needed"""
+        if driver is None:
+            return
+        if self._closed:
+            reason = "pool closed"
+        else:
+            reason = self._needs_recycle(driver)
+            if reason is None and not self._reset(driver):
+                reason = "reset failed"
+        if reason is not None:
+            if not self._closed:
+                print(f"♻️ Recycling Chrome driver ({reason})")
+            self._quit(driver)
+        with self._cond:
+            if reason is None:
+                self._idle.append(driver)
+            else:
+                self._live -= 1
+                if not self._closed:
+                    self.stats["recycled"] += 1
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self):
+        driver = self.acquire()
         try:
-            census_url = "https://geocoding.geo.census.gov/geocoder/locations/onelineaddress"
-            params = {
-                'address': clean_address,
-                'benchmark': 'Public_AR_Current',
-                'format': 'json'
-            }
+            yield driver
+        finally:
+            self.release(driver)
+
+    def _needs_recycle(self, driver: PooledDriver):
+        if driver.pages >= self.max_pages:
+            return f"{driver.pages} pages"
+        rss_mb = self._rss_mb(driver)
+        if rss_mb > self.max_rss_mb:
+            return f"{rss_mb:.0f} MB RSS"
+        return None
 
-            response = requests.get(census_url, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('result', {}).get('addressMatches'):
-                    coords = data['result']['addressMatches'][0]['coordinates']
-                    lat = float(coords['y'])
-                    lng = float(coords['x'])
-                    print(f"✅ Found coordinates via Census: {lat}, {lng}")
-                    return lat, lng
+    @staticmethod
+    def _rss_mb(driver: PooledDriver) -> float:
+        """Resident memory of chromedriver plus all of its Chrome children"""
+        try:
+            proc = psutil.Process(driver.service.process.pid)
+            procs = [proc] + proc.children(recursive=True)
+            return sum(p.memory_info().rss for p in procs) / (1024 * 1024)
+        except Exception:
+            return 0.0
+
+    @staticmethod
+    def _reset(driver: PooledDriver) -> bool:
+        """Clear navigation state and every visited origin's storage so the next lease starts clean.
+
+        CDP only clears storage per origin, so each origin the lease loaded
+        (plus wherever it was redirected to) is cleared; any failure makes
+        the pool recycle the driver instead of leaking state into the next lease.
+        """
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            current = urlparse(driver.current_url or "")
+            if current.scheme in ("http", "https"):
+                driver.origins.add(f"{current.scheme}://{current.netloc}")
+            driver.get("about:blank")
+            driver.pages -= 1  # about:blank does not count towards recycling
+            driver.delete_all_cookies()
+            _drain_performance_log(driver)
+            for origin in sorted(driver.origins):
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+            driver.origins.clear()
+            driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+            return True
         except Exception as e:
-            print(f"⚠️ Census geocoding failed: {e}")
+            print(f"⚠️ Driver reset failed: {e}")
+            return False
 
-        print(f"❌ Could not get coordinates for {address}")
+    def _quit(self, driver: PooledDriver):
+        with self._cond:
+            self._drivers.discard(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def shutdown(self):
+        """Quit every driver, idle or still leased, and refuse further leases"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._live -= len(idle)
+            drivers = list(self._drivers)
+            self._cond.notify_all()
+        for driver in drivers:
+            self._quit(driver)
+
+
+driver_pool = DriverPool()
+atexit.register(driver_pool.shutdown)
+
+
+# ── Politeness pacing & event-driven waits ────────────────────
+PACING_MIN_INTERVAL = float(os.environ.get("AUTOFILL_PACING_MIN_INTERVAL", "2.0"))
+PACING_JITTER = float(os.environ.get("AUTOFILL_PACING_JITTER", "1.0"))
+WAIT_TIMEOUT = float(os.environ.get("AUTOFILL_WAIT_TIMEOUT", "15"))
+
+
+class PacingPolicy:
+    """Politeness pacing for browser navigations, tracked per host.
+
+    A navigation only sleeps when the previous one to the same host was less
+    than ``min_interval`` (plus up to ``jitter``) seconds ago, so pages that
+    are naturally slow to load are never delayed further.
+    """
+
+    def __init__(self, min_interval: float = PACING_MIN_INTERVAL, jitter: float = PACING_JITTER):
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self._next_allowed = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        host = urlparse(url).hostname
+        if not host or self.min_interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_allowed.get(host, 0.0))
+            self._next_allowed[host] = start + self.min_interval + random.uniform(0, self.jitter)
+        if start > now:
+            time.sleep(start - now)
+
+
+pacing = PacingPolicy()
+
+
+def _drain_performance_log(driver) -> list:
+    """Read (and clear) the CDP events chromedriver buffered since the last call"""
+    try:
+        return driver.get_log("performance")
+    except Exception:
+        return []
+
+
+def wait_for_document_ready(driver, timeout: float = WAIT_TIMEOUT) -> bool:
+    """Wait until document.readyState is 'complete'"""
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            lambda d: d.execute_script("return document.readyState") == "complete")
+        return True
+    except Exception:
+        return False
+
+
+def wait_for_url_change(driver, old_url: str, timeout: float = WAIT_TIMEOUT) -> bool:
+    """Wait until the browser has navigated away from old_url"""
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(lambda d: d.current_url != old_url)
+        return True
+    except Exception:
+        return False
+
+
+def wait_for_network_idle(driver, timeout: float = WAIT_TIMEOUT, idle_time: float = 0.5,
+                          max_inflight: int = 2) -> bool:
+    """Wait until at most ``max_inflight`` requests have been pending for ``idle_time`` seconds.
+
+    In-flight requests are tracked from the CDP Network events in
+    chromedriver's performance log. If that log is unavailable, falls back to
+    the page's resource-timing entry count staying flat.
+    """
+    deadline = time.monotonic() + timeout
+    inflight = set()
+    idle_since = None
+    use_cdp = True
+    last_resources = -1
+
+    while time.monotonic() < deadline:
+        if use_cdp:
+            try:
+                entries = driver.get_log("performance")
+            except Exception:
+                use_cdp = False
+                continue
+            for entry in entries:
+                try:
+                    message = json.loads(entry["message"])["message"]
+                except (KeyError, ValueError, TypeError):
+                    continue
+                method = message.get("method", "")
+                request_id = message.get("params", {}).get("requestId")
+                if method == "Network.requestWillBeSent":
+                    inflight.add(request_id)
+                elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                    inflight.discard(request_id)
+            busy = len(inflight) > max_inflight
+        else:
+            try:
+                ready, resources = driver.execute_script(
+                    "return [document.readyState, performance.getEntriesByType('resource').length]")
+            except Exception:
+                return False
+            busy = ready != "complete" or resources != last_resources
+            last_resources = resources
+
+        now = time.monotonic()
+        if busy:
+            idle_since = None
+        elif idle_since is None:
+            idle_since = now
+        elif now - idle_since >= idle_time:
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def wait_for_stable_count(driver, selector: str, timeout: float = WAIT_TIMEOUT, settle: float = 1.0,
+                          min_count: int = 1) -> list:
+    """Wait until at least ``min_count`` elements match and the count stops changing for ``settle`` seconds.
+
+    Returns the matching elements (possibly empty on timeout).
+    """
+    deadline = time.monotonic() + timeout
+    elements = []
+    last_count = -1
+    stable_since = None
+    while time.monotonic() < deadline:
+        try:
+            elements = driver.find_elements(By.CSS_SELECTOR, selector)
+        except Exception:
+            elements = []
+        now = time.monotonic()
+        if len(elements) != last_count:
+            last_count = len(elements)
+            stable_since = now
+        elif len(elements) >= min_count and now - stable_since >= settle:
+            return elements
+        time.sleep(0.2)
+    return elements
+
+
+# ── Persistent caches ─────────────────────────────────────────
+CACHE_DIR = os.environ.get("AUTOFILL_CACHE_DIR",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), ".autofill_cache"))
+
+
+def _open_cache_db(filename: str) -> sqlite3.Connection:
+    """Open (creating if needed) a SQLite database in the cache directory"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(CACHE_DIR, filename), timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+_ADDRESS_ABBREVIATIONS = {
+    "street": "st", "avenue": "ave", "drive": "dr", "road": "rd", "boulevard": "blvd", "lane": "ln",
+    "court": "ct", "place": "pl", "parkway": "pkwy", "terrace": "ter", "circle": "cir", "highway": "hwy",
+    "north": "n", "south": "s", "east": "e", "west": "w", "apartment": "apt", "suite": "ste",
+    "ohio": "oh",
+}
+
+
+def normalize_address(address: str) -> str:
+    """Canonical cache key for an address ('123 Main Street, Columbus, OH' → '123 main st columbus oh')"""
+    if not address:
+        return ""
+    text = re.sub(r"[^a-z0-9# ]+", " ", str(address).lower())
+    words = [_ADDRESS_ABBREVIATIONS.get(word, word) for word in text.split()]
+    if words and words[-1] in ("usa", "us"):
+        words.pop()
+    return " ".join(words)
+
+
+GEOCODE_TTL_DAYS = float(os.environ.get("AUTOFILL_GEOCODE_TTL_DAYS", "180"))
+GEOCODE_NEGATIVE_TTL_DAYS = float(os.environ.get("AUTOFILL_GEOCODE_NEGATIVE_TTL_DAYS", "3"))
+
+
+class GeocodeCache:
+    """On-disk geocode cache keyed by normalized address, with an LRU in front.
+
+    Failed lookups are cached too (as ``(None, None)``) with a shorter TTL so a
+    bad address is not re-queried on every comp card.
+    """
+
+    def __init__(self, filename: str = "geocode.sqlite", ttl_days: float = GEOCODE_TTL_DAYS,
+                 negative_ttl_days: float = GEOCODE_NEGATIVE_TTL_DAYS, memory_size: int = 4096):
+        self.ttl = ttl_days * 86400
+        self.negative_ttl = negative_ttl_days * 86400
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._filename = filename
+        self._conn = None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "negative_hits": 0, "misses": 0, "stores": 0}
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = _open_cache_db(self._filename)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS geocode (
+                    address_key TEXT PRIMARY KEY,
+                    lat REAL,
+                    lng REAL,
+                    source TEXT,
+                    fetched_at REAL NOT NULL
+                )""")
+            self._conn.commit()
+        return self._conn
+
+    def _expired(self, lat, fetched_at) -> bool:
+        ttl = self.ttl if lat is not None else self.negative_ttl
+        return time.time() - fetched_at > ttl
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, address: str):
+        """Return cached (lat, lng), (None, None) for a cached failure, or None on a miss"""
+        key = normalize_address(address)
+        if not key:
+            return None
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[0], entry[2]):
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                if entry[0] is None:
+                    self.stats["negative_hits"] += 1
+                return entry[0], entry[1]
+
+            try:
+                row = self._db().execute("SELECT lat, lng, fetched_at FROM geocode WHERE address_key = ?",
+                                         (key,)).fetchone()
+            except sqlite3.Error as e:
+                print(f"⚠️ Geocode cache read failed: {e}")
+                row = None
+            if row is not None and not self._expired(row[0], row[2]):
+                self._remember(key, row)
+                self.stats["disk_hits"] += 1
+                if row[0] is None:
+                    self.stats["negative_hits"] += 1
+                return row[0], row[1]
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, address: str, lat, lng, source: str = ""):
+        key = normalize_address(address)
+        if not key:
+            return
+        entry = (lat, lng, time.time())
+        with self._lock:
+            self._remember(key, entry)
+            self.stats["stores"] += 1
+            try:
+                self._db().execute("INSERT OR REPLACE INTO geocode (address_key, lat, lng, source, fetched_at) "
+                                   "VALUES (?, ?, ?, ?, ?)", (key, lat, lng, source, entry[2]))
+                self._db().commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Geocode cache write failed: {e}")
+
+
+geocode_cache = GeocodeCache()
+
+
+def get_coordinates_from_address(address: str) -> tuple:
+    """Get lat/lng coordinates from address, served from the geocode cache when possible"""
+    if not address or not str(address).strip():
         return None, None
 
+    cached = geocode_cache.get(address)
+    if cached is not None:
+        return cached
+
+    lat, lng, source = _geocode_uncached(address)
+    if source is not None:
+        geocode_cache.put(address, lat, lng, source)
+    return lat, lng
+
+
+# ── Hedged geocoding ─────────────────────────────────────────
+NOMINATIM_URL = os.environ.get("AUTOFILL_NOMINATIM_URL", "https://nominatim.openstreetmap.org")
+# Seconds the preferred provider gets before the other one is asked as well (0 = ask both at once)
+GEOCODE_HEDGE_DELAY = float(os.environ.get("AUTOFILL_GEOCODE_HEDGE_DELAY", "1.0"))
+GEOCODE_PROVIDER_TIMEOUT = 10
+# Attempts a provider needs in a region before that region's numbers outweigh the global ones
+GEOCODE_MIN_REGION_SAMPLES = 5
+
+
+def _geocode_nominatim(address: str):
+    """(lat, lng) from Nominatim, None when it has no match; raises on request errors"""
+    response = http.get(
+        f"{NOMINATIM_URL}/search",
+        params={"q": address, "format": "json", "limit": 1, "countrycodes": "us"},
+        headers={"User-Agent": "Mozilla/5.0 (compatible; PropertyComps/1.0)"},
+        timeout=GEOCODE_PROVIDER_TIMEOUT,
+    )
+    response.raise_for_status()
+    data = response.json()
+    if not data:
+        return None
+    return float(data[0]["lat"]), float(data[0]["lon"])
+
+
+def _geocode_census(address: str):
+    """(lat, lng) from the Census one-line geocoder, None when it has no match; raises on request errors"""
+    response = http.get(
+        f"{CENSUS_GEOCODER_URL}/locations/onelineaddress",
+        params={"address": address, "benchmark": "Public_AR_Current", "format": "json"},
+        timeout=GEOCODE_PROVIDER_TIMEOUT,
+    )
+    response.raise_for_status()
+    matches = response.json().get("result", {}).get("addressMatches")
+    if not matches:
+        return None
+    coords = matches[0]["coordinates"]
+    return float(coords["y"]), float(coords["x"])
+
+
+GEOCODE_PROVIDERS = {
+    "nominatim": _geocode_nominatim,
+    "census": _geocode_census,
+}
+
+
+def geocode_region(address: str) -> str:
+    """Coarse region an address falls in for provider selection: 3-digit zip prefix, else state"""
+    _, _, state, zip_code = split_address(address)
+    if zip_code:
+        return zip_code[:3]
+    return state.lower() if state else ""
+
+
+class GeocoderStats:
+    """Per-region latency and success counts for each geocoding provider, kept on disk.
+
+    ``order`` ranks providers by expected time to an answer (mean latency over
+    smoothed success rate) so the hedged geocoder asks the likely winner first.
+    Regions with too few samples fall back to the global numbers.
+    """
+
+    GLOBAL = "*"
+
+    def __init__(self, filename: str = "geocode.sqlite", providers=tuple(GEOCODE_PROVIDERS)):
+        self.providers = list(providers)
+        self._filename = filename
+        self._conn = None
+        self._counts = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = _open_cache_db(self._filename)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS geocode_providers (
+                    region TEXT NOT NULL,
+                    provider TEXT NOT NULL,
+                    attempts INTEGER NOT NULL,
+                    successes INTEGER NOT NULL,
+                    latency_s REAL NOT NULL,
+                    PRIMARY KEY (region, provider)
+                )""")
+            self._conn.commit()
+        return self._conn
+
+    def _load(self) -> dict:
+        if self._counts is None:
+            self._counts = {}
+            try:
+                for region, provider, attempts, successes, latency in self._db().execute(
+                        "SELECT region, provider, attempts, successes, latency_s FROM geocode_providers"):
+                    self._counts[(region, provider)] = [attempts, successes, latency]
+            except sqlite3.Error as e:
+                print(f"⚠️ Geocoder stats read failed: {e}")
+        return self._counts
+
+    def record(self, region: str, provider: str, success: bool, latency: float):
+        with self._lock:
+            counts = self._load()
+            for key in {(region or self.GLOBAL, provider), (self.GLOBAL, provider)}:
+                entry = counts.setdefault(key, [0, 0, 0.0])
+                entry[0] += 1
+                entry[1] += int(success)
+                entry[2] += latency
+                try:
+                    self._db().execute("INSERT OR REPLACE INTO geocode_providers "
+                                       "(region, provider, attempts, successes, latency_s) VALUES (?, ?, ?, ?, ?)",
+                                       (*key, *entry))
+                except sqlite3.Error as e:
+                    print(f"⚠️ Geocoder stats write failed: {e}")
+            try:
+                self._db().commit()
+            except sqlite3.Error:
+                pass
+
+    def _score(self, region: str, provider: str) -> float:
+        counts = self._load()
+        entry = counts.get((region, provider))
+        if entry is None or entry[0] < GEOCODE_MIN_REGION_SAMPLES:
+            entry = counts.get((self.GLOBAL, provider))
+        if not entry or not entry[0]:
+            return float("inf")
+        attempts, successes, latency = entry
+        return (latency / attempts) / ((successes + 1) / (attempts + 2))
+
+    def order(self, region: str) -> list:
+        """Providers, most promising first (configured order breaks ties and covers unknowns)"""
+        with self._lock:
+            ranked = sorted(enumerate(self.providers),
+                            key=lambda item: (self._score(region or self.GLOBAL, item[1]), item[0]))
+        return [provider for _, provider in ranked]
+
+    def summary(self) -> dict:
+        with self._lock:
+            counts = self._load()
+            out = {}
+            for provider in self.providers:
+                attempts, successes, latency = counts.get((self.GLOBAL, provider), (0, 0, 0.0))
+                out[provider] = {
+                    "attempts": attempts,
+                    "success_rate": round(successes / attempts, 3) if attempts else None,
+                    "avg_ms": round(latency * 1000 / attempts, 1) if attempts else None,
+                }
+            return out
+
+
+geocoder_stats = GeocoderStats()
+_geocode_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="geocode")
+atexit.register(_geocode_executor.shutdown, wait=False, cancel_futures=True)
+
+
+def _geocode_uncached(address: str, hedge_delay: float | None = None) -> tuple:
+    """Geocode with the providers hedged against each other (no cache).
+
+    The provider ranked first for the address's region is asked first; if it
+    has not answered within ``hedge_delay`` seconds (or answers without a
+    match) the next one is asked too, and the first coordinates to come back
+    win. Providers still queued are cancelled; one already mid-request is left
+    to finish in the background and only feeds the latency/success stats.
+
+    Returns (lat, lng, source). ``source`` is the provider name on success,
+    "" when every provider answered without a match (safe to cache as a
+    negative), and None when a provider errored (don't cache).
+    """
+    clean_address = address.strip()
+    region = geocode_region(clean_address)
+    delay = GEOCODE_HEDGE_DELAY if hedge_delay is None else hedge_delay
+    pending = geocoder_stats.order(region)
+    inflight = {}
+    definitive = True
+
+    def _launch():
+        name = pending.pop(0)
+        started = time.monotonic()
+        print(f"🔄 Asking {name} geocoder...")
+        future = _geocode_executor.submit(GEOCODE_PROVIDERS[name], clean_address)
+
+        def _done(f):
+            if f.cancelled():
+                return
+            ok = f.exception() is None and f.result() is not None
+            geocoder_stats.record(region, name, ok, time.monotonic() - started)
+
+        future.add_done_callback(_done)
+        inflight[future] = name
+
+    try:
+        _launch()
+        hedge_at = time.monotonic() + delay
+        while inflight:
+            timeout = max(0.0, hedge_at - time.monotonic()) if pending else None
+            done, _ = wait(list(inflight), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                _launch()
+                hedge_at = time.monotonic() + delay
+                continue
+            for future in done:
+                name = inflight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"⚠️ {name} geocoding failed: {e}")
+                    definitive = False
+                    continue
+                if result is not None:
+                    for loser in inflight:
+                        loser.cancel()
+                    lat, lng = result
+                    print(f"✅ Found coordinates via {name}: {lat}, {lng}")
+                    return lat, lng, name
+            if not inflight and pending:
+                _launch()
+                hedge_at = time.monotonic() + delay
+
+        print(f"❌ Could not get coordinates for {address}")
+        return None, None, "" if definitive else None
+
     except Exception as e:
         print(f"❌ Error getting coordinates: {e}")
-        return None, None
+        return None, None, None
 
 
 def calculate_distance_fallback(address1: str, address2: str) -> float:
@@ -155,6 +1025,640 @@ def calculate_distance_from_coords(lat1, lng1, lat2, lng2):
         return 999.0
 
 
+# ── Vectorized distance filtering ─────────────────────────────
+EARTH_RADIUS_MILES = 3959
+INVALID_DISTANCE = 999.0
+
+
+def radius_bounding_box(lat: float, lng: float, radius_miles: float) -> tuple:
+    """(lat_min, lat_max, lng_min, lng_max) enclosing a circle of radius_miles around lat/lng.
+
+    The longitude half-width grows with 1/cos(latitude); asin(sin(d)/cos(lat))
+    is the exact longitudinal extent of the circle, so the box never clips it.
+    """
+    angular = radius_miles / EARTH_RADIUS_MILES
+    lat_delta = np.degrees(angular)
+    cos_lat = cos(radians(lat))
+    if cos_lat <= 0 or sin(angular) >= cos_lat:
+        lng_delta = 180.0  # circle reaches a pole
+    else:
+        lng_delta = np.degrees(asin(sin(angular) / cos_lat))
+    return lat - lat_delta, lat + lat_delta, lng - lng_delta, lng + lng_delta
+
+
+def haversine_miles_batch(lat: float, lng: float, lats, lngs) -> np.ndarray:
+    """Haversine distance in miles from one point to arrays of points"""
+    lat1 = np.radians(lat)
+    lat2 = np.radians(np.asarray(lats, dtype=float))
+    dlat = lat2 - lat1
+    dlng = np.radians(np.asarray(lngs, dtype=float) - lng)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return EARTH_RADIUS_MILES * 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def filter_within_radius(lat: float, lng: float, lats, lngs, radius_miles: float) -> tuple:
+    """Distances (miles, rounded to 0.01) and an in-radius mask for arrays of coordinates.
+
+    Rows outside the bounding box, or with missing/zero coordinates, are not
+    run through haversine and report INVALID_DISTANCE.
+    """
+    lats = np.asarray(lats, dtype=float)
+    lngs = np.asarray(lngs, dtype=float)
+    distances = np.full(lats.shape, INVALID_DISTANCE)
+    if lats.size == 0:
+        return distances, np.zeros(lats.shape, dtype=bool)
+
+    lat_min, lat_max, lng_min, lng_max = radius_bounding_box(lat, lng, radius_miles)
+    candidates = ((lats >= lat_min) & (lats <= lat_max) & (lngs >= lng_min) & (lngs <= lng_max)
+                  & (lats != 0) & (lngs != 0))
+    if candidates.any():
+        distances[candidates] = np.round(haversine_miles_batch(lat, lng, lats[candidates], lngs[candidates]), 2)
+    mask = candidates & (distances <= radius_miles)
+    return distances, mask
+
+
+# ── Batch geocoding ───────────────────────────────────────────
+CENSUS_GEOCODER_URL = os.environ.get("AUTOFILL_CENSUS_URL", "https://geocoding.geo.census.gov/geocoder")
+GEOCODE_BATCH_SIZE = int(os.environ.get("AUTOFILL_GEOCODE_BATCH_SIZE", "250"))  # Census allows up to 10,000
+GEOCODE_WORKERS = int(os.environ.get("AUTOFILL_GEOCODE_WORKERS", "4"))
+
+
+def split_address(address: str) -> tuple:
+    """Split '123 Main St, Columbus, OH 43224' into (street, city, state, zip)"""
+    parts = [p.strip() for p in str(address).split(",") if p.strip()]
+    if not parts:
+        return "", "", "", ""
+    street = parts[0]
+    city = state = zip_code = ""
+    rest = parts[1:]
+    if rest:
+        match = re.match(r"^([A-Za-z]{2})(?:\s+(\d{5})(?:-\d{4})?)?$", rest[-1])
+        if match:
+            state, zip_code = match.group(1).upper(), match.group(2) or ""
+            rest = rest[:-1]
+        elif re.fullmatch(r"\d{5}(?:-\d{4})?", rest[-1]):
+            zip_code = rest[-1][:5]
+            rest = rest[:-1]
+    if rest:
+        city = rest[0]
+    return street, city, state, zip_code
+
+
+def _census_batch_geocode(addresses: list[str]) -> dict:
+    """Geocode up to GEOCODE_BATCH_SIZE addresses with one Census batch (CSV upload) request.
+
+    Returns {address: (lat, lng)} for matches and {address: (None, None)} for
+    addresses the Census answered 'No_Match' for. Addresses missing from the
+    result were not answered (request failed) and should be retried elsewhere.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    for i, address in enumerate(addresses):
+        writer.writerow([i, *split_address(address)])
+
+    response = http.post(
+        f"{CENSUS_GEOCODER_URL}/locations/addressbatch",
+        data={"benchmark": "Public_AR_Current"},
+        files={"addressFile": ("addresses.csv", buffer.getvalue(), "text/csv")},
+        timeout=60,
+    )
+    response.raise_for_status()
+
+    results = {}
+    for row in csv.reader(StringIO(response.text)):
+        # id, input address, match status, match type, matched address, "lon,lat", tiger id, side
+        if len(row) < 3 or not row[0].strip().isdigit():
+            continue
+        idx = int(row[0])
+        if idx >= len(addresses):
+            continue
+        status = row[2].strip().lower()
+        if status == "match" and len(row) >= 6 and "," in row[5]:
+            lng_str, lat_str = row[5].split(",", 1)
+            results[addresses[idx]] = (float(lat_str), float(lng_str))
+        elif status in ("no_match", "tie"):
+            results[addresses[idx]] = (None, None)
+    return results
+
+
+def _geocode_census_miss(address: str) -> tuple:
+    """Nominatim's answer for an address the Census batch could not match, cached either way.
+
+    The Census has already said no, so the hedged chain (which would ask it
+    again) is skipped; a miss here is negative-cached so the address is not
+    retried on every run.
+    """
+    try:
+        coords = _geocode_nominatim(address)
+    except Exception as e:
+        print(f"⚠️ Nominatim lookup failed for {address}: {e}")
+        return None, None
+    lat, lng = coords or (None, None)
+    geocode_cache.put(address, lat, lng, "nominatim")
+    return lat, lng
+
+
+def batch_geocode_addresses(addresses: list[str], workers: int = GEOCODE_WORKERS) -> dict:
+    """Resolve many addresses at once: cache first, then Census batch uploads, then single lookups.
+
+    Addresses the Census answered 'No_Match' or 'Tie' for get one Nominatim
+    lookup; only addresses a failed batch request left unanswered go through
+    the full hedged geocoder. Returns {address: (lat, lng)} with (None, None)
+    for addresses that could not be geocoded.
+    """
+    results = {}
+    pending = []
+    for address in dict.fromkeys(a for a in addresses if a):
+        cached = geocode_cache.get(address)
+        if cached is not None:
+            results[address] = cached
+        else:
+            pending.append(address)
+
+    if not pending:
+        return results
+
+    print(f"🗺️ Batch geocoding {len(pending)} addresses ({len(results)} cached)...")
+    chunks = [pending[i:i + GEOCODE_BATCH_SIZE] for i in range(0, len(pending), GEOCODE_BATCH_SIZE)]
+    unmatched = []
+    unanswered = []
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="geocode") as executor:
+        futures = {executor.submit(_census_batch_geocode, chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                batch = future.result()
+            except Exception as e:
+                print(f"⚠️ Census batch geocoding failed: {e}")
+                batch = {}
+            for address in chunk:
+                coords = batch.get(address)
+                if coords is None:
+                    unanswered.append(address)
+                elif coords[0] is None:
+                    unmatched.append(address)
+                else:
+                    geocode_cache.put(address, coords[0], coords[1], "census-batch")
+                    results[address] = coords
+
+        if unmatched:
+            print(f"🔄 Asking Nominatim about {len(unmatched)} addresses the Census could not match...")
+            for address, coords in zip(unmatched, executor.map(_geocode_census_miss, unmatched)):
+                results[address] = coords
+        if unanswered:
+            print(f"🔄 Falling back to single geocoding for {len(unanswered)} addresses...")
+            for address, coords in zip(unanswered, executor.map(get_coordinates_from_address, unanswered)):
+                results[address] = coords
+
+    return results
+
+
+def distances_from_subject(subject_address: str, addresses: list[str]) -> dict:
+    """Distance in miles from the subject to each address (999.0 when either side fails to geocode)"""
+    subject_lat, subject_lng = get_coordinates_from_address(subject_address)
+    if not subject_lat or not subject_lng:
+        return {address: 999.0 for address in addresses}
+
+    # Card addresses without a city/state get the subject's locality so the batch geocoder can place them
+    _, city, state, zip_code = split_address(subject_address)
+    locality = ", ".join(part for part in (city, f"{state} {zip_code}".strip()) if part)
+    lookup = {address: address if "," in address or not locality else f"{address}, {locality}"
+              for address in addresses}
+
+    coords = batch_geocode_addresses(list(lookup.values()))
+    distances = {}
+    for address, query in lookup.items():
+        lat, lng = coords.get(query, (None, None))
+        if lat and lng:
+            distances[address] = calculate_distance_from_coords(subject_lat, subject_lng, lat, lng)
+        else:
+            distances[address] = 999.0
+    return distances
+
+
+# ── Embedded JSON ─────────────────────────────────────────────
+# Assignments pages use to ship their initial state into the browser
+_STATE_MARKERS = (
+    "window.__REDFIN_STATE__",
+    "root.__reactServerState.InitialContext",
+    "__reactServerState.InitialContext",
+    "window.__INITIAL_STATE__",
+    "window.__PRELOADED_STATE__",
+)
+_JSON_SCRIPT_TAG = re.compile(r'<script[^>]*type=["\']application/(?:ld\+)?json["\'][^>]*>', re.IGNORECASE)
+
+
+def find_json_end(text: str, start: int) -> int:
+    """Index just past the JSON object/array opening at text[start], or -1.
+
+    A single forward pass that tracks nesting depth and skips over string
+    literals (including escaped quotes), so it is linear in the blob size
+    and cannot backtrack the way nested regexes do.
+    """
+    depth = 0
+    in_string = False
+    i = start
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if in_string:
+            if ch == "\\":
+                i += 2
+                continue
+            if ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return -1
+
+
+def _decode_json_at(text: str, pos: int):
+    """Decode the JSON value starting at the first '{'/'[' at or after pos (skipping '=' and whitespace)"""
+    n = len(text)
+    while pos < n and text[pos] in " \t\r\n=":
+        pos += 1
+    if pos >= n or text[pos] not in "{[":
+        return None
+    end = find_json_end(text, pos)
+    if end < 0:
+        return None
+    try:
+        return json.loads(text[pos:end])
+    except ValueError:
+        return None
+
+
+def iter_embedded_json(html: str):
+    """Yield every decodable JSON blob embedded in the page: state assignments and JSON script tags"""
+    if not html:
+        return
+    # Markers overlap ("root.__reactServerState..." contains "__reactServerState..."),
+    # so an assignment is decoded once per value offset, not once per marker
+    decoded = set()
+    for marker in _STATE_MARKERS:
+        pos = html.find(marker)
+        while pos >= 0:
+            start = pos + len(marker)
+            if start not in decoded:
+                decoded.add(start)
+                blob = _decode_json_at(html, start)
+                if blob is not None:
+                    yield blob
+            pos = html.find(marker, start)
+    for match in _JSON_SCRIPT_TAG.finditer(html):
+        blob = _decode_json_at(html, match.end())
+        if blob is not None:
+            yield blob
+
+
+def walk_json(obj, path=()):
+    """Depth-first (path, dict) pairs, also descending into '{}&&'-prefixed JSON strings Redfin nests"""
+    stack = [(obj, path)]
+    while stack:
+        node, node_path = stack.pop()
+        if isinstance(node, dict):
+            yield node_path, node
+            for key, value in reversed(list(node.items())):
+                stack.append((value, node_path + (str(key),)))
+        elif isinstance(node, list):
+            for item in reversed(node):
+                stack.append((item, node_path))
+        elif isinstance(node, str) and node.startswith("{}&&"):
+            try:
+                stack.append((json.loads(node[4:]), node_path))
+            except ValueError:
+                continue
+
+
+@dataclass
+class RedfinPropertyRecord:
+    """The subject listing's fields as decoded from the page's embedded state"""
+    property_id: int = None
+    price: int = None
+    beds: float = None
+    baths: float = None
+    sq_ft: int = None
+    lot_size: int = None
+    year_built: int = None
+    garage: int = None
+    agent_name: str = None
+    agent_email: str = None
+
+
+# Record field → embedded-state keys, most specific first
+_RECORD_KEYS = {
+    "price": ("listingPrice", "price", "priceInfo"),
+    "beds": ("beds", "numBeds"),
+    "baths": ("baths", "numBaths"),
+    "sq_ft": ("sqFt", "sqFtFinished", "totalSqFt"),
+    "lot_size": ("lotSize", "lotSqFt"),
+    "year_built": ("yearBuilt",),
+    "garage": ("garageSpaces", "garage", "parkingSpaces"),
+    "agent_name": ("listingAgentName", "agentName"),
+    "agent_email": ("agentEmail", "listingAgentEmail"),
+}
+# Sub-trees describing other homes (comps, ads, recommendations) never supply subject fields
+_FOREIGN_PATH = re.compile(r'comp|similar|nearby|recommend|sponsor|promot|history|event|(^|[^a-z])ads?([^a-z]|$)',
+                           re.IGNORECASE)
+# Sections that hold the subject's current listing; a price elsewhere may be a past sale or an estimate
+_LISTING_SECTIONS = ("aboveTheFold", "addressSectionInfo")
+
+
+def _record_number(value, cast):
+    value = _api_value(value)
+    if isinstance(value, dict):
+        value = value.get("amount") or value.get("value")
+    if isinstance(value, str):
+        value = value.replace(",", "").replace("$", "").strip()
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return cast(number) if number > 0 else None
+
+
+def extract_redfin_record(page: "PageSnapshot") -> RedfinPropertyRecord:
+    """Decode the page's embedded state once and pick out the subject property's fields.
+
+    Only dicts belonging to the listing's own propertyId (taken from the URL)
+    are used when it is known; otherwise dicts under comp/similar/nearby/ad
+    and history/event sub-trees are ignored. The price is only read from the
+    subject's own listing node (its propertyId, or an aboveTheFold /
+    addressSectionInfo section). The first value per field in document order wins.
+    """
+    record = RedfinPropertyRecord()
+    match = re.search(r"/home/(\d+)", page.url or "")
+    subject_id = int(match.group(1)) if match else None
+    record.property_id = subject_id
+
+    for blob in page.embedded_json:
+        for path, node in walk_json(blob):
+            if any(_FOREIGN_PATH.search(key) for key in path):
+                continue
+            node_id = node.get("propertyId")
+            if subject_id is not None and node_id is not None and str(node_id) != str(subject_id):
+                continue
+            is_listing = node_id is not None or any(key in _LISTING_SECTIONS for key in path)
+            for attr, keys in _RECORD_KEYS.items():
+                if getattr(record, attr) is not None or (attr == "price" and not is_listing):
+                    continue
+                for key in keys:
+                    if key not in node:
+                        continue
+                    if attr in ("agent_name", "agent_email"):
+                        value = _api_value(node[key])
+                        if isinstance(value, str) and value.strip():
+                            setattr(record, attr, value.strip())
+                    else:
+                        setattr(record, attr, _record_number(node[key], float if attr == "baths" else int))
+                    if getattr(record, attr) is not None:
+                        break
+            # property_id comes from the URL; stop once every field the sheet reads is filled
+            if all(getattr(record, attr) is not None for attr in _RECORD_KEYS):
+                return record
+    return record
+
+
+# ── Page snapshots ────────────────────────────────────────────
+class PageSnapshot:
+    """The HTML of one page load, with parse products built lazily and cached.
+
+    Grabbing ``driver.page_source`` serializes the whole DOM over WebDriver, so
+    it is done once per page; the soup, the visible text and the embedded JSON
+    blobs are each built at most once, on first use.
+    """
+
+    def __init__(self, html: str, url: str = ""):
+        self.html = html or ""
+        self.url = url
+        self._soup = None
+        self._text = None
+        self._text_lower = None
+        self._embedded_json = None
+        self._redfin_record = None
+
+    @classmethod
+    def from_driver(cls, driver) -> "PageSnapshot":
+        page = cls(driver.page_source, driver.current_url)
+        if snapshot_archive.recording:
+            snapshot_archive.record_page(page, requested_url=getattr(driver, "requested_url", None))
+        return page
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.html, "html.parser")
+        return self._soup
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.soup.get_text()
+        return self._text
+
+    @property
+    def text_lower(self) -> str:
+        if self._text_lower is None:
+            self._text_lower = self.text.lower()
+        return self._text_lower
+
+    @property
+    def embedded_json(self) -> list:
+        """Decoded JSON blobs embedded in the page (state assignments and JSON script tags)"""
+        if self._embedded_json is None:
+            self._embedded_json = list(iter_embedded_json(self.html))
+        return self._embedded_json
+
+    @property
+    def redfin_record(self) -> "RedfinPropertyRecord":
+        if self._redfin_record is None:
+            self._redfin_record = extract_redfin_record(self)
+        return self._redfin_record
+
+    def search(self, pattern, flags=0):
+        """re.search over the raw HTML"""
+        return re.search(pattern, self.html, flags)
+
+    def select(self, selector: str) -> list:
+        return self.soup.select(selector)
+
+    def select_one(self, selector: str):
+        return self.soup.select_one(selector)
+
+
+# ── Snapshot archive (record / replay) ───────────────────────
+# "record" writes every HTTP response and browser page to the archive,
+# "replay" serves HTTP from it and loads listing pages from it instead of Chrome.
+ARCHIVE_MODE = os.environ.get("AUTOFILL_ARCHIVE_MODE", "off")
+ARCHIVE_DIR = os.environ.get("AUTOFILL_ARCHIVE_DIR", os.path.join(CACHE_DIR, "archive"))
+
+
+def _request_key(method: str, url: str, request_kwargs: dict) -> str:
+    """Stable identity of a request: method, full URL with query, and a digest of any body"""
+    full_url = requests.Request(method.upper(), url, params=request_kwargs.get("params")).prepare().url
+    key = f"{method.upper()} {full_url}"
+    body = [request_kwargs.get(name) for name in ("data", "files", "json")]
+    if any(body):
+        key += " " + hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return key
+
+
+class SnapshotArchive:
+    """Content-addressed store of fetched pages and API responses.
+
+    Bodies are gzip-compressed under blobs/<sha256[:2]>/<sha256>.gz, so a page
+    fetched many times unchanged is stored once; an index in archive.sqlite
+    records every fetch (request key, URL, status, fetch time, blob). Replay
+    serves the most recent fetch for a key.
+    """
+
+    def __init__(self, root: str = ARCHIVE_DIR, mode: str = ARCHIVE_MODE):
+        self.root = root
+        self.mode = mode
+        self._conn = None
+        self._lock = threading.Lock()
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0}
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.root, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.root, "archive.sqlite"), timeout=30,
+                                         check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS fetches (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    request_key TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    status INTEGER,
+                    content_type TEXT,
+                    final_url TEXT,
+                    sha256 TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS fetches_key ON fetches (request_key, fetched_at)")
+            self._conn.commit()
+        return self._conn
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, "blobs", digest[:2], f"{digest}.gz")
+
+    def _store(self, content: bytes) -> str:
+        digest = hashlib.sha256(content).hexdigest()
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(gzip.compress(content))
+            os.replace(tmp, path)
+        return digest
+
+    def _load(self, digest: str) -> bytes:
+        with open(self.blob_path(digest), "rb") as f:
+            return gzip.decompress(f.read())
+
+    def _index(self, request_key, url, kind, status, content_type, final_url, digest):
+        with self._lock:
+            try:
+                self._db().execute(
+                    "INSERT INTO fetches (request_key, url, kind, status, content_type, final_url, sha256, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (request_key, url, kind, status, content_type, final_url, digest, time.time()))
+                self._db().commit()
+                self.stats["recorded"] += 1
+            except sqlite3.Error as e:
+                print(f"⚠️ Snapshot archive write failed: {e}")
+
+    def _latest(self, request_key: str):
+        with self._lock:
+            try:
+                return self._db().execute(
+                    "SELECT status, content_type, final_url, sha256 FROM fetches WHERE request_key = ? "
+                    "ORDER BY fetched_at DESC, id DESC LIMIT 1", (request_key,)).fetchone()
+            except sqlite3.Error as e:
+                print(f"⚠️ Snapshot archive read failed: {e}")
+                return None
+
+    def record_response(self, method: str, url: str, request_kwargs: dict, response: requests.Response):
+        digest = self._store(response.content)
+        self._index(_request_key(method, url, request_kwargs), url, "http", response.status_code,
+                    response.headers.get("Content-Type"), response.url, digest)
+
+    def replay_response(self, method: str, url: str, request_kwargs: dict) -> requests.Response:
+        """The archived response for this request; raises requests.ConnectionError when none was recorded"""
+        key = _request_key(method, url, request_kwargs)
+        row = self._latest(key)
+        if row is None:
+            self.stats["misses"] += 1
+            raise requests.ConnectionError(f"Not in snapshot archive: {key}")
+        status, content_type, final_url, digest = row
+        response = requests.Response()
+        response.status_code = status
+        response._content = self._load(digest)
+        response.url = final_url or url
+        if content_type:
+            response.headers["Content-Type"] = content_type
+        response.encoding = response.encoding or requests.utils.get_encoding_from_headers(response.headers) or "utf-8"
+        self.stats["replayed"] += 1
+        return response
+
+    def record_page(self, page: "PageSnapshot", requested_url: str | None = None, kind: str = "browser") -> str:
+        """Archive a rendered page; returns the blob path"""
+        digest = self._store(page.html.encode("utf-8"))
+        url = requested_url or page.url
+        self._index(f"PAGE {url}", url, kind, None, "text/html", page.url, digest)
+        return self.blob_path(digest)
+
+    def page(self, url: str):
+        """The latest archived rendering of `url` as a PageSnapshot, or None"""
+        row = self._latest(f"PAGE {url}") or self._latest(_request_key("GET", url, {}))
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["replayed"] += 1
+        return PageSnapshot(self._load(row[3]).decode("utf-8", errors="replace"), row[2] or url)
+
+    def iter_pages(self, url_contains: str = "", kinds=("browser", "debug")):
+        """(url, fetched_at, PageSnapshot) for every archived page whose URL contains `url_contains`"""
+        placeholders = ",".join("?" for _ in kinds)
+        with self._lock:
+            rows = self._db().execute(
+                f"SELECT url, final_url, sha256, fetched_at FROM fetches WHERE kind IN ({placeholders}) "
+                "AND url LIKE ? ORDER BY fetched_at", (*kinds, f"%{url_contains}%")).fetchall()
+        for url, final_url, digest, fetched_at in rows:
+            yield url, fetched_at, PageSnapshot(self._load(digest).decode("utf-8", errors="replace"), final_url or url)
+
+
+snapshot_archive = SnapshotArchive()
+
+
+def load_page_snapshot(url: str):
+    """Archived snapshot of `url` when replaying, else None (the caller loads it live)"""
+    if not snapshot_archive.replaying:
+        return None
+    page = snapshot_archive.page(url)
+    if page is None:
+        print(f"📼 {url} is not in the snapshot archive")
+    return page
+
+
 def wait_and_find_elements(driver, selectors, timeout=10):
     """Try multiple selectors and wait for elements to load"""
     for selector in selectors:
@@ -169,11 +1673,77 @@ def wait_and_find_elements(driver, selectors, timeout=10):
     return []
 
 
+# Collects every card's fields in the page and returns them as one JSON string,
+# so processing N cards costs one WebDriver round trip instead of several per card.
+_CARD_EXTRACT_JS = r"""
+const [selectors, limit, skipAds, minCount, addressSelectors, priceSelectors] = arguments;
+const AD = /(^|[^a-z])(ad|ads|advert|advertisement|sponsored|promo|banner)([^a-z]|$)/i;
+const firstText = (card, list) => {
+    for (const sel of list) {
+        let el = null;
+        try { el = card.querySelector(sel); } catch (e) { continue; }
+        if (el) return el.innerText;
+    }
+    return null;
+};
+for (const sel of selectors) {
+    let cards;
+    try { cards = Array.from(document.querySelectorAll(sel)); } catch (e) { continue; }
+    if (cards.length < minCount) continue;
+    const out = [];
+    for (const card of cards) {
+        const cls = typeof card.className === 'string' ? card.className : (card.getAttribute('class') || '');
+        const attrs = [cls, card.id, card.getAttribute('data-rf-test-name'), card.getAttribute('aria-label')].join(' ');
+        const isAd = AD.test(attrs);
+        if (skipAds && isAd) continue;
+        const link = card.querySelector('a[href*="/home/"]') || card.querySelector('a[href]');
+        out.push({
+            text: card.innerText || '',
+            html: card.outerHTML,
+            address: firstText(card, addressSelectors),
+            price: firstText(card, priceSelectors),
+            href: link ? link.href : '',
+            isAd: isAd
+        });
+        if (out.length >= limit) break;
+    }
+    if (out.length) return JSON.stringify({selector: sel, total: cards.length, cards: out});
+}
+return JSON.stringify({selector: null, total: 0, cards: []});
+"""
+
+
+def extract_cards_in_browser(driver, selectors: list, limit: int = 50, skip_ads: bool = False,
+                             min_count: int = 1) -> tuple:
+    """Collect raw card fields for the first selector with at least ``min_count`` matches.
+
+    Returns (selector, cards) where each card is a dict with text, html,
+    address, price, href and isAd.
+    """
+    try:
+        payload = json.loads(driver.execute_script(
+            _CARD_EXTRACT_JS, selectors, limit, skip_ads, min_count,
+            _CARD_ADDRESS_SELECTORS, _CARD_PRICE_SELECTORS))
+        return payload.get("selector"), payload.get("cards", [])
+    except Exception as e:
+        print(f"⚠️ In-browser card extraction failed: {e}")
+        return None, []
+
+
 def extract_property_details(card_element):
     """Extract property details from a card element with improved parsing"""
     try:
-        card_text = card_element.text.lower()
-        card_html = card_element.get_attribute('outerHTML')
+        return parse_property_details(card_element.text, card_element.get_attribute('outerHTML'))
+    except Exception as e:
+        print(f"❌ Error extracting property details: {e}")
+        return None
+
+
+def parse_property_details(card_text: str, card_html: str):
+    """Parse address/price/beds/baths/sqft from a card's visible text and outer HTML"""
+    try:
+        card_text = (card_text or "").lower()
+        card_html = card_html or ""
 
         data = {}
 
@@ -240,33 +1810,15 @@ def search_redfin_selenium_improved(address: str, radius_miles: float = 1.0, day
     """Improved Selenium scraping with better element detection and waiting"""
     driver = None
     try:
-        options = Options()
-        options.add_argument("--headless")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-logging")
-        options.add_argument("--log-level=3")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("--disable-web-security")
-        options.add_argument("--allow-running-insecure-content")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        options.add_argument(
-            "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-
         print("🌐 Starting improved browser scraping...")
-        driver = webdriver.Chrome(options=options)
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-
-        # Set window size for better rendering
-        driver.set_window_size(1920, 1080)
+        driver = driver_pool.acquire()
 
         # Navigate to Redfin and search
         print(f"🔍 Searching for: {address}")
-        driver.get("https://www.redfin.com")
+        driver.get(REDFIN_BASE_URL)
 
         # Wait for page to load
-        time.sleep(random.uniform(2, 4))
+        wait_for_document_ready(driver)
 
         # Find and use search box with multiple selectors
         search_selectors = [
@@ -289,16 +1841,18 @@ def search_redfin_selenium_improved(address: str, radius_miles: float = 1.0, day
         if search_box:
             search_box.clear()
             search_box.send_keys(address)
-            time.sleep(1)
+            # Let the autocomplete request settle before submitting
+            wait_for_network_idle(driver, timeout=3, max_inflight=0)
+            start_url = driver.current_url
             search_box.send_keys(Keys.RETURN)
-            time.sleep(random.uniform(3, 5))
+            wait_for_url_change(driver, start_url)
             print("✅ Address search completed")
         else:
             print("⚠️ Could not find search box")
             return []
 
         # Wait for search results to load
-        time.sleep(random.uniform(3, 5))
+        wait_for_network_idle(driver)
 
         # Try to navigate to sold homes
         current_url = driver.current_url
@@ -314,29 +1868,21 @@ def search_redfin_selenium_improved(address: str, radius_miles: float = 1.0, day
                 f"{current_url}&sold={days_back}d" if '?' in current_url else f"{current_url}?sold={days_back}d"
             ]
 
+            # Check if we have property cards
+            test_selectors = [
+                ".SearchResultCard",
+                ".HomeCard",
+                "[data-rf-test-name*='card']",
+                ".PropertyCard"
+            ]
+
             for sold_url in sold_urls:
                 try:
                     print(f"🔄 Trying sold URL: {sold_url}")
                     driver.get(sold_url)
-                    time.sleep(random.uniform(4, 6))
-
-                    # Check if we have property cards
-                    test_selectors = [
-                        ".SearchResultCard",
-                        ".HomeCard",
-                        "[data-rf-test-name*='card']",
-                        ".PropertyCard"
-                    ]
 
-                    found_cards = False
-                    for selector in test_selectors:
-                        try:
-                            cards = driver.find_elements(By.CSS_SELECTOR, selector)
-                            if len(cards) > 0:
-                                found_cards = True
-                                break
-                        except:
-                            continue
+                    # Resolves as soon as the card list stops growing
+                    found_cards = bool(wait_for_stable_count(driver, ", ".join(test_selectors), timeout=10))
 
                     if found_cards:
                         print(f"✅ Found property cards at: {sold_url}")
@@ -357,26 +1903,18 @@ def search_redfin_selenium_improved(address: str, radius_miles: float = 1.0, day
             ".property-item"
         ]
 
-        property_cards = []
-        for selector in property_selectors:
-            try:
-                cards = WebDriverWait(driver, 15).until(
-                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector))
-                )
-                if cards:
-                    property_cards = cards
-                    print(f"✅ Found {len(cards)} property cards with selector: {selector}")
-                    break
-            except:
-                continue
+        wait_for_stable_count(driver, ", ".join(property_selectors))
+        selector, property_cards = extract_cards_in_browser(driver, property_selectors, limit=50)
+        if property_cards:
+            print(f"✅ Found {len(property_cards)} property cards with selector: {selector}")
 
         if not property_cards:
             print("⚠️ No property cards found, trying scroll and wait...")
             # Try scrolling to load more content
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(3)
+            wait_for_network_idle(driver, timeout=5)
             driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(2)
+            wait_for_network_idle(driver, timeout=3)
 
             # Try again with more generic selectors
             generic_selectors = [
@@ -386,122 +1924,760 @@ def search_redfin_selenium_improved(address: str, radius_miles: float = 1.0, day
                 "[class*='home' i]"
             ]
 
-            for selector in generic_selectors:
-                try:
-                    cards = driver.find_elements(By.CSS_SELECTOR, selector)
-                    if len(cards) > 5:  # Reasonable number of cards
-                        property_cards = cards
-                        print(f"✅ Found {len(cards)} elements with generic selector: {selector}")
-                        break
-                except:
-                    continue
+            # Reasonable number of cards
+            selector, property_cards = extract_cards_in_browser(driver, generic_selectors, limit=50, min_count=6)
+            if property_cards:
+                print(f"✅ Found {len(property_cards)} elements with generic selector: {selector}")
 
         if not property_cards:
             print("❌ No property cards found after all attempts")
             return []
 
         # Process property cards
-        sold_homes = []
+        candidates = []
         for i, card in enumerate(property_cards[:50]):  # Limit to first 50
             try:
-                property_data = extract_property_details(card)
+                property_data = parse_property_details(card['text'], card['html'])
                 if property_data and property_data.get('address') and property_data.get('price'):
-                    # Calculate distance
-                    distance = calculate_distance_fallback(address, property_data['address'])
-
-                    if distance <= radius_miles and distance < 999:
-                        property_data['distance'] = distance
-                        sold_homes.append(property_data)
-                        print(
-                            f"✅ Property {len(sold_homes)}: {property_data['address'][:50]}... - ${property_data['price']:,} ({distance:.2f}mi)")
-                    else:
-                        print(f"⚠️ Property outside radius: {distance:.2f}mi")
-
+                    property_data['url'] = card.get('href', '')
+                    candidates.append(property_data)
             except Exception as e:
                 print(f"❌ Error processing card {i}: {e}")
                 continue
 
+        # Geocode all card addresses in one batch against a single subject coordinate
+        distances = distances_from_subject(address, [c['address'] for c in candidates])
+
+        sold_homes = []
+        for property_data in candidates:
+            distance = distances.get(property_data['address'], 999.0)
+            if distance <= radius_miles and distance < 999:
+                property_data['distance'] = distance
+                sold_homes.append(property_data)
+                print(
+                    f"✅ Property {len(sold_homes)}: {property_data['address'][:50]}... - ${property_data['price']:,} ({distance:.2f}mi)")
+            else:
+                print(f"⚠️ Property outside radius: {distance:.2f}mi")
+
         print(f"✅ Found {len(sold_homes)} properties within {radius_miles} miles")
         return sold_homes
 
-    except Exception as e:
-        print(f"❌ Improved Selenium scraping failed: {e}")
-        return []
-    finally:
-        if driver:
-            driver.quit()
+    except Exception as e:
+        print(f"❌ Improved Selenium scraping failed: {e}")
+        return []
+    finally:
+        driver_pool.release(driver)
+
+
+# ── Stingray gis fetch planner ──────────────────────────────────────────────
+
+# The gis endpoint returns at most this many homes per request; a full page means the box was truncated
+GIS_PAGE_SIZE = 350
+# Full boxes are split into quadrants down to this span (degrees), below which they are paged instead
+GIS_MIN_SPLIT_DEG = float(os.environ.get("AUTOFILL_GIS_MIN_SPLIT_DEG", "0.005"))
+GIS_MAX_PAGES = 10
+# Concurrent gis requests; the per-host TokenBucket in HttpClient still sets the request rate
+GIS_WORKERS = int(os.environ.get("AUTOFILL_GIS_WORKERS", "4"))
+_gis_executor = ThreadPoolExecutor(max_workers=GIS_WORKERS, thread_name_prefix="gis")
+
+
+def _gis_home_key(home: dict) -> str:
+    """Identity of a gis home across overlapping boxes and pages"""
+    property_id = _api_value(home.get("propertyId"))
+    if property_id:
+        identity = f"id:{property_id}"
+    else:
+        identity = f"addr:{normalize_address(str(_api_value(home.get('streetLine')) or ''))}|{home.get('zip')}"
+    return f"{identity}|{_api_value(home.get('soldDate'))}"
+
+
+def split_box(bounds: tuple) -> list[tuple]:
+    """The four quadrants of a (lat_min, lat_max, lng_min, lng_max) box"""
+    lat_min, lat_max, lng_min, lng_max = bounds
+    lat_mid, lng_mid = (lat_min + lat_max) / 2, (lng_min + lng_max) / 2
+    return [(lat_min, lat_mid, lng_min, lng_mid), (lat_min, lat_mid, lng_mid, lng_max),
+            (lat_mid, lat_max, lng_min, lng_mid), (lat_mid, lat_max, lng_mid, lng_max)]
+
+
+def _gis_page(bounds: tuple, days_back: int, page_number: int = 1, region=None):
+    """One gis request for a box; its homes, or None if the request failed.
+
+    Only the region's market is sent: a region_id would clip the box to
+    that one zip or city and drop comps across its border.
+    """
+    lat_min, lat_max, lng_min, lng_max = bounds
+    params = {
+        'al': '1',
+        'num_homes': str(GIS_PAGE_SIZE),
+        'ord': 'redfin-recommended-asc',
+        'page_number': str(page_number),
+        'sf': '1,2,3,5,6,7',
+        'sold_within_days': str(days_back),
+        'status': '9',  # Sold status
+        'uipt': '1,2,3,4,5,6',
+        'v': '8',
+        'lat_min': str(lat_min),
+        'lat_max': str(lat_max),
+        'lng_min': str(lng_min),
+        'lng_max': str(lng_max)
+    }
+    if region is not None and region.market:
+        params['market'] = region.market
+    try:
+        response = http.get(f"{REDFIN_BASE_URL}/stingray/api/gis", params=params, timeout=15)
+        if response.status_code != 200:
+            print(f"⚠️ gis request returned {response.status_code}")
+            return None
+        data = parse_stingray_json(response.text)
+    except Exception as e:
+        print(f"⚠️ gis request failed: {e}")
+        return None
+    if not isinstance(data, dict) or 'payload' not in data:
+        return None
+    return data['payload'].get('homes') or []
+
+
+def fetch_gis_homes(jobs: list[tuple], region=None) -> list[tuple]:
+    """Every sold home for each (bounds, days_back) job, as per-job (homes, complete) pairs.
+
+    A response that fills a whole page was truncated, so its box is split
+    into quadrants (or paged, once narrower than GIS_MIN_SPLIT_DEG) and the
+    pieces re-requested. All requests share the gis executor and each job's
+    homes are deduplicated across its sub-boxes and pages. homes is None
+    where a request failed; complete is False when a box was still full
+    after GIS_MAX_PAGES pages.
+    """
+    homes_by_job = [{} for _ in jobs]
+    failed = [False] * len(jobs)
+    complete = [True] * len(jobs)
+    pending = {}
+
+    def submit(job, bounds, days_back, page_number):
+        future = _gis_executor.submit(_gis_page, bounds, days_back, page_number, region)
+        pending[future] = (job, bounds, days_back, page_number)
+
+    for job, (bounds, days_back) in enumerate(jobs):
+        submit(job, bounds, days_back, 1)
+
+    request_count = 0
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            job, bounds, days_back, page_number = pending.pop(future)
+            request_count += 1
+            homes = future.result()
+            if homes is None:
+                failed[job] = True
+            if homes is None or failed[job]:
+                continue
+            for home in homes:
+                homes_by_job[job].setdefault(_gis_home_key(home), home)
+            if len(homes) < GIS_PAGE_SIZE:
+                continue
+
+            lat_min, lat_max, lng_min, lng_max = bounds
+            if page_number == 1 and max(lat_max - lat_min, lng_max - lng_min) > GIS_MIN_SPLIT_DEG:
+                for quadrant in split_box(bounds):
+                    submit(job, quadrant, days_back, 1)
+            elif page_number < GIS_MAX_PAGES:
+                submit(job, bounds, days_back, page_number + 1)
+            else:
+                complete[job] = False
+                print(f"⚠️ gis box {bounds} still full after {page_number} pages; results truncated")
+
+    print(f"🗺️ {request_count} gis requests for {len(jobs)} box(es)")
+    return [(None if failed[job] else list(homes_by_job[job].values()), complete[job]) for job in range(len(jobs))]
+
+
+def try_redfin_api_alternative(lat: float, lng: float, radius_miles: float = 1.0, days_back: int = 365,
+                               bounds: tuple | None = None, region=None):
+    """Try alternative Redfin API endpoints; raw stingray homes, or None if no endpoint answered.
+
+    ``bounds`` (lat_min, lat_max, lng_min, lng_max) overrides the box derived
+    from lat/lng/radius_miles; ``region`` (a RedfinRegion) supplies the market.
+    """
+    try:
+        bounds = bounds or radius_bounding_box(lat, lng, radius_miles)
+        lat_min, lat_max, lng_min, lng_max = bounds
+
+        homes, _ = fetch_gis_homes([(bounds, days_back)], region)[0]
+        if homes is not None:
+            print(f"✅ Found {len(homes)} homes in gis response")
+            return homes
+
+        # Older endpoints, tried when gis itself does not answer
+        api_endpoints = [
+            f"{REDFIN_BASE_URL}/stingray/api/v1/search",
+            f"{REDFIN_BASE_URL}/stingray/api/home/details"
+        ]
+
+        answered = False
+        for endpoint in api_endpoints:
+            try:
+                print(f"📡 Trying API endpoint: {endpoint}")
+
+                params = {
+                    'al': '1',
+                    'num_homes': str(GIS_PAGE_SIZE),
+                    'ord': 'redfin-recommended-asc',
+                    'page_number': '1',
+                    'sf': '1,2,3,5,6,7',
+                    'sold_within_days': str(days_back),
+                    'status': '9',  # Sold status
+                    'uipt': '1,2,3,4,5,6',
+                    'v': '8',
+                    'lat_min': str(lat_min),
+                    'lat_max': str(lat_max),
+                    'lng_min': str(lng_min),
+                    'lng_max': str(lng_max)
+                }
+                if region is not None and region.market:
+                    params['market'] = region.market
+
+                response = http.get(endpoint, params=params, timeout=15)
+
+                if response.status_code == 200:
+                    print(f"✅ Got response from {endpoint}")
+
+                    # Try to parse as JSON
+                    try:
+                        data = parse_stingray_json(response.text)
+                        if isinstance(data, dict) and 'payload' in data:
+                            answered = True
+                            homes = data['payload'].get('homes', [])
+                            if homes:
+                                print(f"✅ Found {len(homes)} homes in API response")
+                                return homes
+                    except json.JSONDecodeError:
+                        pass
+
+            except Exception as e:
+                print(f"⚠️ API endpoint {endpoint} failed: {e}")
+                continue
+
+        # [] when the API answered with no homes, None when no endpoint answered at all
+        return [] if answered else None
+
+    except Exception as e:
+        print(f"❌ Alternative API search failed: {e}")
+        return None
+
+
+# Skip the browser comps search when the stingray API alone returns at least this many comps
+MIN_API_COMPS = int(os.environ.get("AUTOFILL_MIN_API_COMPS", "5"))
+
+
+def _api_value(field):
+    """Unwrap stingray's {"value": x} fields; plain values pass through"""
+    if isinstance(field, dict) and "value" in field:
+        return field["value"]
+    return field
+
+
+def api_home_lat_lng(home: dict) -> tuple:
+    """(lat, lng) of a stingray home in either the flat or the {"value": {...}} latLong shape"""
+    lat_long = _api_value(home.get("latLong")) or {}
+    try:
+        return float(lat_long.get("latitude") or 0), float(lat_long.get("longitude") or 0)
+    except (TypeError, ValueError, AttributeError):
+        return 0.0, 0.0
+
+
+def _api_sold_date(value) -> str:
+    """Normalize stingray soldDate (epoch millis or a date string) to YYYY-MM-DD"""
+    value = _api_value(value)
+    if isinstance(value, (int, float)) and value > 0:
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+    if isinstance(value, str) and value.strip():
+        text = value.strip()
+        for fmt in ('%Y-%m-%d', '%b %d, %Y', '%B %d, %Y', '%m/%d/%Y', '%B-%d-%Y'):
+            try:
+                return datetime.strptime(text[:10] if fmt == '%Y-%m-%d' else text, fmt).strftime('%Y-%m-%d')
+            except ValueError:
+                continue
+    return ""
+
+
+def api_home_to_comp(home: dict, distance: float) -> dict:
+    """Convert one stingray gis payload home into the comp dict schema"""
+    street = _api_value(home.get("streetLine")) or ""
+    unit = _api_value(home.get("unitNumber")) or ""
+    if unit and not isinstance(unit, dict):
+        street = f"{street} {unit}"
+    city = home.get("city") or ""
+    state = home.get("state") or ""
+    zip_code = home.get("zip") or _api_value(home.get("postalCode")) or ""
+    address = ", ".join(part for part in (street, city, f"{state} {zip_code}".strip()) if part)
+
+    price = int(_api_value(home.get("price")) or 0)
+    sqft = int(_api_value(home.get("sqFt")) or 0)
+    url = home.get("url") or ""
+    if url.startswith("/"):
+        url = REDFIN_BASE_URL + url
+
+    return {
+        "address": address,
+        "soldDate": _api_sold_date(home.get("soldDate")),
+        "price": price,
+        "sqft": sqft,
+        "ppsq": round(price / sqft) if sqft > 0 else 0,
+        "beds": _api_value(home.get("beds")) or 0,
+        "baths": _api_value(home.get("baths")) or 0,
+        "lot": int(_api_value(home.get("lotSize")) or 0),
+        "dist": distance,
+        "url": url,
+        "img": None
+    }
+
+
+def api_homes_to_comps(homes: list, lat: float, lng: float, radius_miles: float) -> list[dict]:
+    """Convert stingray payload homes within radius_miles into comps, nearest first"""
+    coords = [api_home_lat_lng(home) for home in homes]
+    distances, mask = filter_within_radius(lat, lng, [c[0] for c in coords], [c[1] for c in coords], radius_miles)
+    comps = []
+    for i in np.flatnonzero(mask):
+        try:
+            comp = api_home_to_comp(homes[i], float(distances[i]))
+        except Exception as e:
+            print(f"⚠️ Error converting API home: {e}")
+            continue
+        if comp["address"] and comp["price"] > 0:
+            comps.append(comp)
+    comps.sort(key=lambda c: c["dist"])
+    return comps
+
+
+# ── Local sold-homes store ────────────────────────────────────
+# An area synced less than this long ago is answered locally without asking Redfin
+COMPS_SYNC_TTL_HOURS = float(os.environ.get("AUTOFILL_COMPS_SYNC_TTL_HOURS", "24"))
+# Incremental syncs re-fetch this many days before the last sync (sales post late)
+COMPS_SYNC_OVERLAP_DAYS = int(os.environ.get("AUTOFILL_COMPS_SYNC_OVERLAP_DAYS", "7"))
+# Sales are fetched and cached per square tile of this many degrees (0.04° ≈ 2.8 mi of latitude)
+COMPS_TILE_DEG = float(os.environ.get("AUTOFILL_COMPS_TILE_DEG", "0.04"))
+
+
+def tiles_covering(lat: float, lng: float, radius_miles: float, tile_deg: float = COMPS_TILE_DEG) -> list[tuple]:
+    """(row, col) grid tiles overlapping the circle's bounding box"""
+    lat_min, lat_max, lng_min, lng_max = radius_bounding_box(lat, lng, radius_miles)
+    return [(i, j)
+            for i in range(int(lat_min // tile_deg), int(lat_max // tile_deg) + 1)
+            for j in range(int(lng_min // tile_deg), int(lng_max // tile_deg) + 1)]
+
+
+def tile_bounds(tile: tuple, tile_deg: float = COMPS_TILE_DEG) -> tuple:
+    """(lat_min, lat_max, lng_min, lng_max) of a grid tile"""
+    i, j = tile
+    return i * tile_deg, (i + 1) * tile_deg, j * tile_deg, (j + 1) * tile_deg
+
+
+def tile_key(tile: tuple, tile_deg: float = COMPS_TILE_DEG) -> str:
+    # The tile size is part of the key so changing it never reuses tiles of another size
+    return f"{tile_deg:g}:{tile[0]}:{tile[1]}"
+
+_SOLD_HOME_COLUMNS = ("home_key", "property_id", "address", "sold_date", "price", "sqft", "beds", "baths",
+                      "lot", "lat", "lng", "url")
+
+
+def csv_row_to_comp(row: dict) -> dict:
+    """Convert one gis-csv row (Redfin's download columns) into the comp dict schema, plus lat/lng"""
+    def number(key, cast=int):
+        try:
+            return cast(float(str(row.get(key) or 0).replace(",", "")))
+        except ValueError:
+            return cast(0)
+
+    street = row.get("ADDRESS") or ""
+    city = row.get("CITY") or ""
+    state = row.get("STATE OR PROVINCE") or ""
+    zip_code = row.get("ZIP OR POSTAL CODE") or ""
+    price, sqft = number("PRICE"), number("SQUARE FEET")
+    url = next((v for k, v in row.items() if k.startswith("URL")), "") or ""
+    return {
+        "address": ", ".join(part for part in (street, city, f"{state} {zip_code}".strip()) if part),
+        "soldDate": _api_sold_date(row.get("SOLD DATE")),
+        "price": price,
+        "sqft": sqft,
+        "ppsq": round(price / sqft) if sqft > 0 else 0,
+        "beds": number("BEDS"),
+        "baths": number("BATHS", float),
+        "lot": number("LOT SIZE"),
+        "dist": INVALID_DISTANCE,
+        "url": url,
+        "img": None,
+        "lat": number("LATITUDE", float),
+        "lng": number("LONGITUDE", float),
+    }
+
+
+class SoldHomesStore:
+    """Every sold home seen in a stingray gis/gis-csv response, kept in SQLite.
+
+    A sale is identified by Redfin property id (or normalized address when
+    there is none) plus sold date, so re-ingesting the same rows only
+    refreshes them. ``sync_tiles`` records which grid tiles have been
+    fetched, for how many days back, and when — the watermark incremental
+    syncs resume from.
+    """
+
+    def __init__(self, filename: str = "sold_homes.sqlite"):
+        self._filename = filename
+        self._conn = None
+        self._lock = threading.Lock()
+        self.stats = {"ingested": 0, "tile_hits": 0, "full_syncs": 0, "incremental_syncs": 0}
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = _open_cache_db(self._filename)
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS sold_homes (
+                    home_key TEXT PRIMARY KEY,
+                    property_id INTEGER,
+                    address TEXT NOT NULL,
+                    sold_date TEXT NOT NULL,
+                    price INTEGER,
+                    sqft INTEGER,
+                    beds REAL,
+                    baths REAL,
+                    lot INTEGER,
+                    lat REAL NOT NULL,
+                    lng REAL NOT NULL,
+                    url TEXT,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS sold_homes_lat ON sold_homes (lat, lng);
+                CREATE TABLE IF NOT EXISTS sync_tiles (
+                    tile_key TEXT PRIMARY KEY,
+                    days_covered INTEGER NOT NULL,
+                    synced_at REAL NOT NULL
+                );
+                -- Per-circle sync records, superseded by sync_tiles
+                DROP TABLE IF EXISTS sync_areas;
+            """)
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def _row(comp: dict, property_id, lat: float, lng: float):
+        if not comp.get("address") or not comp.get("soldDate") or not lat or not lng:
+            return None
+        identity = f"id:{property_id}" if property_id else f"addr:{normalize_address(comp['address'])}"
+        return (f"{identity}|{comp['soldDate']}", property_id, comp["address"], comp["soldDate"], comp.get("price"),
+                comp.get("sqft"), comp.get("beds"), comp.get("baths"), comp.get("lot"), lat, lng, comp.get("url"))
+
+    def _write(self, rows: list) -> int:
+        rows = [row for row in rows if row is not None]
+        if not rows:
+            return 0
+        now = time.time()
+        with self._lock:
+            try:
+                self._db().executemany(
+                    f"INSERT OR REPLACE INTO sold_homes ({', '.join(_SOLD_HOME_COLUMNS)}, updated_at) "
+                    f"VALUES ({', '.join('?' for _ in _SOLD_HOME_COLUMNS)}, ?)", [(*row, now) for row in rows])
+                self._db().commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Sold-homes store write failed: {e}")
+                return 0
+            self.stats["ingested"] += len(rows)
+        with _comps_index_lock:
+            if _comps_index is not None:
+                _comps_index.insert_many(rows)
+        return len(rows)
+
+    def iter_batches(self, batch_size: int = 10000):
+        """Every stored sale, as lists of up to batch_size tuples in _SOLD_HOME_COLUMNS order.
+
+        The store's lock is held until the generator is exhausted or closed,
+        since the cursor shares the store's connection.
+        """
+        with self._lock:
+            try:
+                cursor = self._db().execute(f"SELECT {', '.join(_SOLD_HOME_COLUMNS)} FROM sold_homes")
+                while rows := cursor.fetchmany(batch_size):
+                    yield rows
+            except sqlite3.Error as e:
+                print(f"⚠️ Sold-homes store read failed: {e}")
+
+    def ingest_api_homes(self, homes: list) -> int:
+        """Store raw stingray gis homes; returns the number of rows written"""
+        rows = []
+        for home in homes or []:
+            try:
+                lat, lng = api_home_lat_lng(home)
+                rows.append(self._row(api_home_to_comp(home, INVALID_DISTANCE), _api_value(home.get("propertyId")),
+                                      lat, lng))
+            except Exception as e:
+                print(f"⚠️ Skipping unparseable API home: {e}")
+        return self._write(rows)
+
+    def ingest_csv_rows(self, csv_rows: list) -> int:
+        """Store gis-csv rows (dicts keyed by the CSV header); returns the number of rows written"""
+        rows = []
+        for raw in csv_rows or []:
+            comp = csv_row_to_comp(raw)
+            rows.append(self._row(comp, None, comp.pop("lat"), comp.pop("lng")))
+        return self._write(rows)
+
+    def tile_state(self, keys: list) -> dict:
+        """{tile_key: (days_covered, synced_at)} for the tiles that have been synced"""
+        if not keys:
+            return {}
+        with self._lock:
+            try:
+                rows = self._db().execute(
+                    f"SELECT tile_key, days_covered, synced_at FROM sync_tiles "
+                    f"WHERE tile_key IN ({', '.join('?' for _ in keys)})", list(keys)).fetchall()
+            except sqlite3.Error as e:
+                print(f"⚠️ Sold-homes store read failed: {e}")
+                return {}
+        return {key: (days_covered, synced_at) for key, days_covered, synced_at in rows}
+
+    def mark_tile_synced(self, key: str, days_covered: int, synced_at: float):
+        with self._lock:
+            try:
+                self._db().execute("INSERT OR REPLACE INTO sync_tiles (tile_key, days_covered, synced_at) "
+                                   "VALUES (?, ?, ?)", (key, days_covered, synced_at))
+                self._db().commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Sold-homes store write failed: {e}")
+
+
+sold_homes_store = SoldHomesStore()
+
+
+def sync_sold_homes(lat: float, lng: float, radius_miles: float, days_back: int,
+                    tile_deg: float = COMPS_TILE_DEG, address: str = "") -> bool:
+    """Bring the store up to date for the tiles under this circle; False if any tile fetch failed.
+
+    Tiles synced within COMPS_SYNC_TTL_HOURS for at least days_back are
+    served as they are (nearby subjects share them); stale tiles fetch only
+    the sales since their watermark (minus an overlap); tiles never synced,
+    or synced for a shorter window, fetch the whole window. The Redfin
+    region (for the market) is only resolved when some tile needs fetching.
+    """
+    tiles = tiles_covering(lat, lng, radius_miles, tile_deg)
+    keys = [tile_key(tile, tile_deg) for tile in tiles]
+    states = sold_homes_store.tile_state(keys)
+    now = time.time()
+    ok = True
+    hits = fetched = 0
+    stale = []  # (tile_key, days_covered, fetch_days, bounds)
+
+    for tile, key in zip(tiles, keys):
+        state = states.get(key)
+        if state is not None and state[0] >= days_back and now - state[1] < COMPS_SYNC_TTL_HOURS * 3600:
+            hits += 1
+            continue
+        if state is not None and state[0] >= days_back:
+            days_covered = state[0]
+            fetch_days = min(days_covered, int((now - state[1]) // 86400) + 1 + COMPS_SYNC_OVERLAP_DAYS)
+            sold_homes_store.stats["incremental_syncs"] += 1
+        else:
+            days_covered = fetch_days = days_back
+            sold_homes_store.stats["full_syncs"] += 1
+        stale.append((key, days_covered, fetch_days, tile_bounds(tile, tile_deg)))
+
+    results = []
+    if stale:
+        region = resolve_redfin_region(address, lat, lng)
+        results = fetch_gis_homes([(bounds, fetch_days) for _, _, fetch_days, bounds in stale], region)
+    for (key, days_covered, _, _), (homes, complete) in zip(stale, results):
+        if homes is None:
+            ok = False
+            continue
+        fetched += sold_homes_store.ingest_api_homes(homes)
+        # A truncated tile keeps what it got but is fetched again next time
+        if complete:
+            sold_homes_store.mark_tile_synced(key, days_covered, now)
+        else:
+            ok = False
+
+    sold_homes_store.stats["tile_hits"] += hits
+    print(f"💾 {hits}/{len(tiles)} comp tiles served from cache, {fetched} sold homes fetched")
+    return ok
 
 
-def try_redfin_api_alternative(lat: float, lng: float, radius_miles: float = 1.0, days_back: int = 365) -> list:
-    """Try alternative Redfin API endpoints"""
-    try:
-        # Calculate date range
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days_back)
+# ── Spatial index over stored sales ───────────────────────────
+# Grid cell size in degrees (0.01° ≈ 0.7 mi of latitude)
+SPATIAL_CELL_DEG = float(os.environ.get("AUTOFILL_SPATIAL_CELL_DEG", "0.01"))
 
-        # Try different API endpoints
-        api_endpoints = [
-            "https://www.redfin.com/stingray/api/gis",
-            "https://www.redfin.com/stingray/api/v1/search",
-            "https://www.redfin.com/stingray/api/home/details"
-        ]
 
-        # Convert radius to approximate bounding box
-        lat_delta = radius_miles * 0.0145  # Rough conversion
-        lng_delta = radius_miles * 0.0145
+class SpatialIndex:
+    """In-memory lat/lng grid over sold homes for radius + sold-date window queries.
 
-        for endpoint in api_endpoints:
-            try:
-                print(f"📡 Trying API endpoint: {endpoint}")
+    Coordinates, sale dates and numeric facts live in growable numpy columns;
+    each grid cell lists the rows inside it. A query gathers the rows of the
+    cells overlapping the circle's bounding box and filters those with vector
+    operations, so its cost follows the neighbourhood's density, not the
+    total number of homes. Rows are keyed like the store (home_key), so
+    re-inserting a sale updates it in place.
+    """
 
-                params = {
-                    'al': '1',
-                    'num_homes': '350',
-                    'ord': 'redfin-recommended-asc',
-                    'page_number': '1',
-                    'sf': '1,2,3,5,6,7',
-                    'sold_within_days': str(days_back),
-                    'status': '9',  # Sold status
-                    'uipt': '1,2,3,4,5,6',
-                    'v': '8',
-                    'lat_min': str(lat - lat_delta),
-                    'lat_max': str(lat + lat_delta),
-                    'lng_min': str(lng - lng_delta),
-                    'lng_max': str(lng + lng_delta)
+    NUMERIC = ("price", "sqft", "beds", "baths", "lot")
+
+    def __init__(self, cell_deg: float = SPATIAL_CELL_DEG, capacity: int = 1024):
+        self.cell_deg = cell_deg
+        self._size = 0
+        self._lat = np.zeros(capacity)
+        self._lng = np.zeros(capacity)
+        self._sold = np.zeros(capacity, dtype=np.int32)
+        self._numeric = {name: np.zeros(capacity) for name in self.NUMERIC}
+        self._address, self._sold_date, self._url = [], [], []
+        self._rows = {}
+        self._cells = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _cell(self, lat: float, lng: float) -> tuple:
+        return int(lat // self.cell_deg), int(lng // self.cell_deg)
+
+    def _grow(self, needed: int):
+        capacity = len(self._lat)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        self._lat = np.resize(self._lat, capacity)
+        self._lng = np.resize(self._lng, capacity)
+        self._sold = np.resize(self._sold, capacity)
+        self._numeric = {name: np.resize(column, capacity) for name, column in self._numeric.items()}
+
+    def insert_many(self, rows) -> int:
+        """Add or update sales given as tuples in _SOLD_HOME_COLUMNS order; returns rows inserted"""
+        rows = list(rows)
+        inserted = 0
+        with self._lock:
+            self._grow(self._size + len(rows))
+            for home_key, _, address, sold_date, price, sqft, beds, baths, lot, lat, lng, url in rows:
+                sold = parse_sold_date(sold_date) if sold_date else None
+                if sold is None or not lat or not lng:
+                    continue
+                row = self._rows.get(home_key)
+                cell = self._cell(lat, lng)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._rows[home_key] = row
+                    self._address.append(address)
+                    self._sold_date.append(sold_date)
+                    self._url.append(url)
+                    self._cells.setdefault(cell, []).append(row)
+                    inserted += 1
+                else:
+                    old_cell = self._cell(self._lat[row], self._lng[row])
+                    if old_cell != cell:
+                        self._cells[old_cell].remove(row)
+                        self._cells.setdefault(cell, []).append(row)
+                    self._address[row], self._sold_date[row], self._url[row] = address, sold_date, url
+                self._set(row, lat, lng, sold, price, sqft, beds, baths, lot)
+        return inserted
+
+    def _set(self, row, lat, lng, sold, price, sqft, beds, baths, lot):
+        self._lat[row] = lat
+        self._lng[row] = lng
+        self._sold[row] = sold.toordinal()
+        for name, value in zip(self.NUMERIC, (price, sqft, beds, baths, lot)):
+            self._numeric[name][row] = value or 0
+
+    def _filter_mask(self, rows: np.ndarray, filters: dict) -> np.ndarray:
+        keep = np.ones(rows.shape, dtype=bool)
+        for key, bound in filters.items():
+            op, _, name = key.partition("_")
+            if op not in ("min", "max") or name not in self.NUMERIC:
+                raise ValueError(f"Unknown comp filter: {key}")
+            values = self._numeric[name][rows]
+            keep &= values >= bound if op == "min" else values <= bound
+        return keep
+
+    def search(self, lat: float, lng: float, radius_miles: float, days_back: int,
+               filters: dict | None = None, today: date | None = None) -> tuple:
+        """(rows, distances) of matching sales, nearest first, without building comp dicts"""
+        lat_min, lat_max, lng_min, lng_max = radius_bounding_box(lat, lng, radius_miles)
+        cutoff = (today or date.today()).toordinal() - days_back
+        with self._lock:
+            candidates = []
+            for i in range(int(lat_min // self.cell_deg), int(lat_max // self.cell_deg) + 1):
+                for j in range(int(lng_min // self.cell_deg), int(lng_max // self.cell_deg) + 1):
+                    cell = self._cells.get((i, j))
+                    if cell:
+                        candidates.extend(cell)
+            rows = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            keep = self._sold[rows] >= cutoff
+            if filters:
+                keep &= self._filter_mask(rows, filters)
+            rows = rows[keep]
+            distances, mask = filter_within_radius(lat, lng, self._lat[rows], self._lng[rows], radius_miles)
+            rows, distances = rows[mask], distances[mask]
+            order = np.argsort(distances, kind="stable")
+            return rows[order], distances[order]
+
+    def query(self, lat: float, lng: float, radius_miles: float, days_back: int,
+              filters: dict | None = None, today: date | None = None) -> list[dict]:
+        """Sales within radius_miles sold in the last days_back days, as comps nearest first.
+
+        ``filters`` takes min_/max_ bounds on price, sqft, beds, baths or lot,
+        e.g. {"min_beds": 3, "max_price": 250000}.
+        """
+        with self._lock:
+            rows, distances = self.search(lat, lng, radius_miles, days_back, filters, today)
+
+            # Pull the result columns out as plain lists once; per-row numpy indexing is slow
+            price = self._numeric["price"][rows].astype(np.int64).tolist()
+            sqft = self._numeric["sqft"][rows].astype(np.int64).tolist()
+            beds = self._numeric["beds"][rows].tolist()
+            baths = self._numeric["baths"][rows].tolist()
+            lot = self._numeric["lot"][rows].astype(np.int64).tolist()
+            return [
+                {
+                    "address": self._address[row],
+                    "soldDate": self._sold_date[row],
+                    "price": price[k],
+                    "sqft": sqft[k],
+                    "ppsq": round(price[k] / sqft[k]) if sqft[k] > 0 else 0,
+                    "beds": beds[k],
+                    "baths": baths[k],
+                    "lot": lot[k],
+                    "dist": dist,
+                    "url": self._url[row] or "",
+                    "img": None,
                 }
+                for k, (row, dist) in enumerate(zip(rows.tolist(), distances.tolist()))
+            ]
 
-                response = session.get(endpoint, params=params, timeout=15)
 
-                if response.status_code == 200:
-                    print(f"✅ Got response from {endpoint}")
+_comps_index = None
+_comps_index_lock = threading.Lock()
 
-                    # Try to parse as JSON
-                    try:
-                        data = response.json()
-                        if isinstance(data, dict) and 'payload' in data:
-                            homes = data['payload'].get('homes', [])
-                            if homes:
-                                print(f"✅ Found {len(homes)} homes in API response")
-                                return homes
-                    except json.JSONDecodeError:
-                        pass
 
-            except Exception as e:
-                print(f"⚠️ API endpoint {endpoint} failed: {e}")
-                continue
+def comps_index() -> SpatialIndex:
+    """The process-wide spatial index, loaded from the sold-homes store on first use"""
+    global _comps_index
+    with _comps_index_lock:
+        if _comps_index is None:
+            index = SpatialIndex()
+            for rows in sold_homes_store.iter_batches():
+                index.insert_many(rows)
+            _comps_index = index
+        return _comps_index
 
-        return []
 
-    except Exception as e:
-        print(f"❌ Alternative API search failed: {e}")
-        return []
+def find_comps(lat: float, lng: float, radius_miles: float, days_back: int, filters: dict | None = None) -> list[dict]:
+    """Stored sales around lat/lng within radius_miles and the last days_back days, nearest first"""
+    return comps_index().query(lat, lng, radius_miles, days_back, filters)
 
 
 def get_redfin_comps_enhanced(address: str,
                               radius_miles: float = 1,
                               sold_within_days: int = 365,
-                              max_rows: int = 200) -> list[dict]:
-    """Enhanced version with multiple fallback methods"""
+                              max_rows: int = 200,
+                              min_api_comps: int = MIN_API_COMPS) -> list[dict]:
+    """Enhanced version with multiple fallback methods.
+
+    The stingray API payload is used directly; the browser search only runs
+    when the API yields fewer than ``min_api_comps`` comps.
+    """
     try:
         print(f"🔍 Getting coordinates for: {address}")
         lat, lng = get_coordinates_from_address(address)
@@ -512,22 +2688,27 @@ def get_redfin_comps_enhanced(address: str,
 
         print(f"📍 Coordinates: {lat}, {lng}")
 
-        # Method 1: Try alternative API endpoints
-        print("🔄 Trying alternative API endpoints...")
-        api_results = try_redfin_api_alternative(lat, lng, radius_miles, sold_within_days)
+        # Method 1: Sync the local sold-homes store from the API and answer from it
+        print("🔄 Syncing sold homes from the API...")
+        sync_sold_homes(lat, lng, radius_miles, sold_within_days, address=address)
+        api_comps = find_comps(lat, lng, radius_miles, sold_within_days)
+        if api_comps:
+            print(f"✅ {len(api_comps)} API comps within {radius_miles} miles")
 
-        if api_results:
-            print(f"✅ API returned {len(api_results)} results")
-            # Process API results (implementation depends on API response structure)
-            # This would need to be implemented based on actual API response format
+        if api_comps and len(api_comps) >= min_api_comps:
+            print("⏭️ Enough API comps, skipping browser search")
+            return api_comps[:max_rows]
 
         # Method 2: Use improved Selenium scraping
         print("🔄 Using improved Selenium scraping...")
         selenium_results = search_redfin_selenium_improved(address, radius_miles, sold_within_days)
 
         if selenium_results:
-            comps = []
+            comps = list(api_comps)
+            seen = {normalize_address(c["address"]) for c in comps}
             for result in selenium_results[:max_rows]:
+                if normalize_address(result.get('address', '')) in seen:
+                    continue
                 try:
                     comp = {
                         "address": result.get('address', ''),
@@ -540,7 +2721,7 @@ def get_redfin_comps_enhanced(address: str,
                         "baths": result.get('baths', 0),
                         "lot": 0,
                         "dist": result.get('distance', 0),
-                        "url": "",
+                        "url": result.get('url', ''),
                         "img": None
                     }
                     comps.append(comp)
@@ -549,7 +2730,11 @@ def get_redfin_comps_enhanced(address: str,
                     continue
 
             print(f"✅ Successfully processed {len(comps)} comparable sales")
-            return comps
+            return comps[:max_rows]
+
+        if api_comps:
+            print(f"✅ Using {len(api_comps)} API comps")
+            return api_comps[:max_rows]
 
         print("❌ No comparable sales found")
         return []
@@ -558,63 +2743,77 @@ def get_redfin_comps_enhanced(address: str,
         print(f"❌ Error in enhanced get_redfin_comps: {e}")
         return []
 
+# Whole-word ad markers; a bare substring test for "ad" also hits "address", "data-", "header"...
+_AD_PATTERN = re.compile(r'(?<![a-z])(ad|ads|advert|advertisement|sponsored|promo|banner)(?![a-z])', re.IGNORECASE)
+
+
 def is_ad_element(element):
     """Check if an element is likely an advertisement"""
     try:
-        # Check class names and attributes for ad indicators
-        class_name = element.get_attribute('class') or ''
-        data_attrs = element.get_attribute('outerHTML') or ''
-
-        ad_indicators = ['ad', 'advertisement', 'sponsored', 'promo', 'banner']
-        return any(indicator in class_name.lower() or indicator in data_attrs.lower()
-                   for indicator in ad_indicators)
+        # Check class names and identifying attributes for ad indicators
+        attrs = " ".join(element.get_attribute(name) or '' for name in
+                         ('class', 'id', 'data-rf-test-name', 'aria-label'))
+        return bool(_AD_PATTERN.search(attrs))
     except:
         return False
 
 
+_CARD_ADDRESS_SELECTORS = [
+    "[data-rf-test-name*='address']",
+    ".address, .property-address",
+    "[class*='address' i]"
+]
+_CARD_PRICE_SELECTORS = [
+    "[data-rf-test-name*='price']",
+    ".price, .sold-price",
+    "[class*='price' i]"
+]
+
+
 def extract_data_from_card(card):
     """Extract property data from a card element"""
     try:
-        data = {}
-
-        # Try to extract address
-        address_selectors = [
-            "[data-rf-test-name*='address']",
-            ".address, .property-address",
-            "[class*='address' i]"
-        ]
-
-        for selector in address_selectors:
+        address_text = None
+        for selector in _CARD_ADDRESS_SELECTORS:
             try:
-                address_elem = card.find_element(By.CSS_SELECTOR, selector)
-                data['address'] = address_elem.text.strip()
+                address_text = card.find_element(By.CSS_SELECTOR, selector).text
                 break
             except:
                 continue
 
-        # Try to extract price
-        price_selectors = [
-            "[data-rf-test-name*='price']",
-            ".price, .sold-price",
-            "[class*='price' i]"
-        ]
-
-        for selector in price_selectors:
+        price_text = None
+        for selector in _CARD_PRICE_SELECTORS:
             try:
-                price_elem = card.find_element(By.CSS_SELECTOR, selector)
-                price_text = price_elem.text.strip()
-                # Extract numeric price
-                price_str = ''.join(filter(str.isdigit, price_text))
-                data['price'] = int(price_str) if price_str else 0
+                price_text = card.find_element(By.CSS_SELECTOR, selector).text
                 break
             except:
                 continue
 
+        return parse_card_data(address_text, price_text, card.text)
+
+    except Exception as e:
+        print(f"❌ Error extracting card data: {e}")
+        return None
+
+
+def parse_card_data(address_text, price_text, card_text: str):
+    """Build a card's property data from its address/price element text and full text"""
+    try:
+        data = {}
+
+        # Address
+        if address_text is not None:
+            data['address'] = address_text.strip()
+
+        # Extract numeric price
+        if price_text is not None:
+            price_str = ''.join(filter(str.isdigit, price_text))
+            data['price'] = int(price_str) if price_str else 0
+
         # Extract other details (beds, baths, sqft)
-        details_text = card.text.lower()
+        details_text = (card_text or "").lower()
 
         # Extract beds
-        import re
         beds_match = re.search(r'(\d+)\s*bed', details_text)
         data['beds'] = int(beds_match.group(1)) if beds_match else 0
 
@@ -640,25 +2839,16 @@ def extract_data_from_card(card):
 def extract_json_from_html(html_source):
     """Extract JSON data from HTML source"""
     try:
-        # Look for common patterns where Redfin embeds data
-        import re
+        # Linear scan of the blobs Redfin embeds (window.__REDFIN_STATE__, server state, JSON scripts)
+        blobs = list(iter_embedded_json(html_source))
 
-        # Pattern 1: window.__REDFIN_STATE__
-        state_pattern = r'window\.__REDFIN_STATE__\s*=\s*({.+?});'
-        match = re.search(state_pattern, html_source, re.DOTALL)
-        if match:
-            return json.loads(match.group(1))
-
-        # Pattern 2: Other embedded JSON
-        json_pattern = r'({[^{]*"homes"[^}]*(?:{[^}]*}[^}]*)*})'
-        matches = re.finditer(json_pattern, html_source)
-        for match in matches:
-            try:
-                return json.loads(match.group(1))
-            except:
-                continue
+        # Prefer the object that actually holds a list of homes
+        for blob in blobs:
+            for _, node in walk_json(blob):
+                if isinstance(node.get("homes"), list):
+                    return node
 
-        return None
+        return blobs[0] if blobs else None
     except Exception as e:
         print(f"❌ Error extracting JSON from HTML: {e}")
         return None
@@ -733,7 +2923,7 @@ def parse_csv_response(csv_text, lat, lng, radius_miles):
 
         # Parse header
         headers = [h.strip().strip('"') for h in lines[0].split(',')]
-        homes = []
+        rows, lats, lngs = [], [], []
 
         for line in lines[1:]:
             try:
@@ -748,18 +2938,19 @@ def parse_csv_response(csv_text, lat, lng, radius_miles):
                 home_lng = float(home_dict.get('LONGITUDE', 0))
 
                 if home_lat and home_lng:
-                    # Calculate distance
-                    distance = calculate_distance_from_coords(lat, lng, home_lat, home_lng)
-
-                    if distance <= radius_miles:
-                        homes.append({
-                            'raw_data': home_dict,
-                            'distance': distance
-                        })
+                    rows.append(home_dict)
+                    lats.append(home_lat)
+                    lngs.append(home_lng)
             except Exception as e:
                 print(f"⚠️ Error parsing CSV line: {e}")
                 continue
 
+        sold_homes_store.ingest_csv_rows(rows)
+
+        # Calculate all distances in one call
+        distances, mask = filter_within_radius(lat, lng, lats, lngs, radius_miles)
+        homes = [{'raw_data': rows[i], 'distance': float(distances[i])} for i in np.flatnonzero(mask)]
+
         print(f"✅ Parsed {len(homes)} homes from enhanced CSV")
         return homes
 
@@ -803,31 +2994,40 @@ def parse_redfin_home_data(home_data, distance):
         return None
 
 
-def search_redfin_sold_homes_enhanced(lat: float, lng: float, radius_miles: float = 1.0, days_back: int = 365) -> list:
-    """Search for sold homes using multiple API approaches"""
+def search_redfin_sold_homes_enhanced(lat: float, lng: float, radius_miles: float = 1.0, days_back: int = 365,
+                                      region=None) -> list:
+    """Search for sold homes using multiple API approaches.
+
+    ``region`` (a RedfinRegion) is resolved from the coordinates when not given;
+    the region-keyed CSV endpoint is skipped when there is none.
+    """
     try:
+        if region is None:
+            region = resolve_redfin_region(lat=lat, lng=lng)
+
         # Try multiple Redfin API endpoints
         api_urls = [
             # Primary search API
-            "https://www.redfin.com/stingray/api/gis",
+            f"{REDFIN_BASE_URL}/stingray/api/gis",
             # Alternative search endpoint
-            "https://www.redfin.com/stingray/api/v1/search/rentals",
+            f"{REDFIN_BASE_URL}/stingray/api/v1/search/rentals",
             # Map data endpoint
-            "https://www.redfin.com/stingray/api/gis-csv"
+            f"{REDFIN_BASE_URL}/stingray/api/gis-csv"
         ]
 
         # Calculate bounding box around the coordinates
-        miles_to_deg = radius_miles * 0.0145
+        lat_min, lat_max, lng_min, lng_max = radius_bounding_box(lat, lng, radius_miles)
 
         for api_url in api_urls:
             try:
+                if 'gis-csv' in api_url and region is None:
+                    continue
                 print(f"📡 Trying API: {api_url}")
 
                 if 'gis-csv' in api_url:
                     # CSV format request
                     params = {
                         'al': '1',
-                        'market': 'cleveland',
                         'num_homes': '350',
                         'ord': 'redfin-recommended-asc',
                         'page_number': '1',
@@ -836,14 +3036,12 @@ def search_redfin_sold_homes_enhanced(lat: float, lng: float, radius_miles: floa
                         'status': '9',
                         'uipt': '1,2,3,4,5,6',
                         'v': '8',
-                        'region_id': '39035',  # Cleveland region
-                        'region_type': '2'
+                        **region.params()
                     }
                 else:
                     # JSON format request
                     params = {
                         'al': '1',
-                        'market': 'cleveland',
                         'num_homes': '350',
                         'ord': 'redfin-recommended-asc',
                         'page_number': '1',
@@ -851,8 +3049,14 @@ def search_redfin_sold_homes_enhanced(lat: float, lng: float, radius_miles: floa
                         'sold_within_days': str(days_back),
                         'status': '9',
                         'uipt': '1,2,3,4,5,6',
-                        'v': '8'
+                        'v': '8',
+                        'lat_min': str(lat_min),
+                        'lat_max': str(lat_max),
+                        'lng_min': str(lng_min),
+                        'lng_max': str(lng_max)
                     }
+                    if region is not None and region.market:
+                        params['market'] = region.market
 
                 headers = {
                     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -860,31 +3064,25 @@ def search_redfin_sold_homes_enhanced(lat: float, lng: float, radius_miles: floa
                     'Referer': 'https://www.redfin.com/'
                 }
 
-                response = session.get(api_url, params=params, headers=headers, timeout=15)
+                response = http.get(api_url, params=params, headers=headers, timeout=15)
 
                 if response.status_code == 200:
                     print(f"✅ Got response from {api_url}, processing...")
 
                     # Try JSON first
                     try:
-                        data = response.json()
+                        data = parse_stingray_json(response.text)
                         if 'payload' in data and 'homes' in data['payload']:
-                            homes = []
-                            for home in data['payload']['homes']:
-                                # Calculate distance from search center
-                                home_lat = home.get('latLong', {}).get('latitude')
-                                home_lng = home.get('latLong', {}).get('longitude')
-
-                                distance = 999
-                                if home_lat and home_lng:
-                                    distance = calculate_distance_from_coords(lat, lng, home_lat, home_lng)
-
-                                # Only include homes within radius
-                                if distance <= radius_miles:
-                                    homes.append({
-                                        'raw_data': home,
-                                        'distance': distance
-                                    })
+                            api_homes = data['payload']['homes']
+                            sold_homes_store.ingest_api_homes(api_homes)
+                            coords = [api_home_lat_lng(home) for home in api_homes]
+                            lats = [c[0] for c in coords]
+                            lngs = [c[1] for c in coords]
+
+                            # Calculate distance from search center and keep homes within radius
+                            distances, mask = filter_within_radius(lat, lng, lats, lngs, radius_miles)
+                            homes = [{'raw_data': api_homes[i], 'distance': float(distances[i])}
+                                     for i in np.flatnonzero(mask)]
 
                             if homes:
                                 print(f"✅ Found {len(homes)} homes within {radius_miles} miles via JSON")
@@ -915,26 +3113,12 @@ def search_redfin_sold_homes_selenium_enhanced(address: str, radius_miles: float
     """Enhanced Selenium scraping with direct address search"""
     driver = None
     try:
-        options = Options()
-        options.add_argument("--headless")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-logging")
-        options.add_argument("--log-level=3")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        options.add_argument(
-            "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-
         print("🌐 Starting address-based browser scraping...")
-        driver = webdriver.Chrome(options=options)
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        driver = driver_pool.acquire()
 
         # Start with Redfin home page and search for the address directly
         print(f"🔍 Searching for address: {address}")
-        driver.get("https://www.redfin.com")
-        time.sleep(3)
+        driver.get(REDFIN_BASE_URL)
 
         # Find and use the search box
         try:
@@ -943,15 +3127,17 @@ def search_redfin_sold_homes_selenium_enhanced(address: str, radius_miles: float
             )
             search_box.clear()
             search_box.send_keys(address)
+            start_url = driver.current_url
             search_box.send_keys(Keys.RETURN)
-            time.sleep(3)
+            wait_for_url_change(driver, start_url)
+            wait_for_network_idle(driver)
             print("✅ Address search completed")
         except Exception as e:
             print(f"⚠️ Could not use search box: {e}")
             # Fallback to direct URL construction
-            search_url = f"https://www.redfin.com/stingray/do/location-autocomplete?location={quote_plus(address)}&start=0&count=10&v=2"
+            search_url = f"{REDFIN_BASE_URL}/stingray/do/location-autocomplete?location={quote_plus(address)}&start=0&count=10&v=2"
             driver.get(search_url)
-            time.sleep(3)
+            wait_for_document_ready(driver)
 
         # Navigate to sold homes in the area
         try:
@@ -959,8 +3145,10 @@ def search_redfin_sold_homes_selenium_enhanced(address: str, radius_miles: float
             sold_links = driver.find_elements(By.XPATH,
                                               "//a[contains(text(), 'Recently Sold') or contains(text(), 'Sold') or contains(@href, 'sold')]")
             if sold_links:
+                start_url = driver.current_url
                 sold_links[0].click()
-                time.sleep(5)
+                wait_for_url_change(driver, start_url)
+                wait_for_network_idle(driver)
                 print("✅ Navigated to sold homes")
             else:
                 # Try modifying URL to show sold homes
@@ -971,20 +3159,15 @@ def search_redfin_sold_homes_selenium_enhanced(address: str, radius_miles: float
                     else:
                         sold_url = current_url + f"/filter/include=sold-{days_back}d"
                     driver.get(sold_url)
-                    time.sleep(5)
+                    wait_for_network_idle(driver)
                     print("✅ Modified URL to show sold homes")
         except Exception as e:
             print(f"⚠️ Could not navigate to sold homes: {e}")
 
         # Wait for property cards to load
-        try:
-            WebDriverWait(driver, 15).until(
-                lambda driver: len([card for card in driver.find_elements(By.CSS_SELECTOR,
-                                                                          ".HomeCard, [data-rf-test-name='MapHomeCard'], .SearchResultCard")
-                                    if not is_ad_element(card)]) > 0
-            )
+        if wait_for_stable_count(driver, ".HomeCard, [data-rf-test-name='MapHomeCard'], .SearchResultCard"):
             print("✅ Property cards loaded")
-        except:
+        else:
             print("⚠️ Timeout waiting for property cards")
 
         # Extract properties with multiple selectors
@@ -996,18 +3179,10 @@ def search_redfin_sold_homes_selenium_enhanced(address: str, radius_miles: float
             "[class*='Card'][class*='home' i]"
         ]
 
-        property_cards = []
-        for selector in property_selectors:
-            try:
-                cards = driver.find_elements(By.CSS_SELECTOR, selector)
-                if cards:
-                    filtered_cards = [card for card in cards if not is_ad_element(card)]
-                    if filtered_cards:
-                        property_cards = filtered_cards
-                        print(f"✅ Found {len(filtered_cards)} property cards with selector: {selector}")
-                        break
-            except:
-                continue
+        # One round trip: ads are filtered in the browser
+        selector, property_cards = extract_cards_in_browser(driver, property_selectors, limit=50, skip_ads=True)
+        if property_cards:
+            print(f"✅ Found {len(property_cards)} property cards with selector: {selector}")
 
         if not property_cards:
             print("⚠️ No property cards found, trying page source extraction...")
@@ -1025,11 +3200,12 @@ def search_redfin_sold_homes_selenium_enhanced(address: str, radius_miles: float
             return []
 
         # Process cards and filter by distance
-        sold_homes = []
+        candidates = []
         for i, card in enumerate(property_cards[:50]):
             try:
-                home_data = extract_data_from_card(card)
+                home_data = parse_card_data(card.get('address'), card.get('price'), card.get('text'))
                 if home_data and home_data.get('address'):
+                    home_data['url'] = card.get('href', '')
                     # Skip if address contains obvious non-local indicators
                     home_address = home_data['address'].lower()
                     if any(state in home_address for state in
@@ -1037,22 +3213,27 @@ def search_redfin_sold_homes_selenium_enhanced(address: str, radius_miles: float
                             ' new york']) and 'oh' not in home_address and 'ohio' not in home_address:
                         print(f"⚠️ Skipping non-local property: {home_data['address'][:40]}...")
                         continue
-
-                    # Calculate distance to subject property
-                    distance = calculate_distance_fallback(address, home_data['address'])
-
-                    # Only include if within radius and distance calculation succeeded
-                    if distance <= radius_miles and distance < 999:
-                        home_data['distance'] = distance
-                        sold_homes.append(home_data)
-                        print(f"✅ Property {len(sold_homes)}: {home_data['address'][:40]}... - {distance:.2f}mi")
-                    else:
-                        print(f"⚠️ Property too far or invalid: {home_data['address'][:40]}... - {distance:.2f}mi")
+                    candidates.append(home_data)
 
             except Exception as e:
                 print(f"❌ Error processing card {i + 1}: {e}")
                 continue
 
+        # Geocode all card addresses in one batch against a single subject coordinate
+        distances = distances_from_subject(address, [h['address'] for h in candidates])
+
+        sold_homes = []
+        for home_data in candidates:
+            distance = distances.get(home_data['address'], 999.0)
+
+            # Only include if within radius and distance calculation succeeded
+            if distance <= radius_miles and distance < 999:
+                home_data['distance'] = distance
+                sold_homes.append(home_data)
+                print(f"✅ Property {len(sold_homes)}: {home_data['address'][:40]}... - {distance:.2f}mi")
+            else:
+                print(f"⚠️ Property too far or invalid: {home_data['address'][:40]}... - {distance:.2f}mi")
+
         print(f"✅ Found {len(sold_homes)} properties within {radius_miles} miles")
         return sold_homes
 
@@ -1060,117 +3241,153 @@ def search_redfin_sold_homes_selenium_enhanced(address: str, radius_miles: float
         print(f"❌ Enhanced Selenium scraping failed: {e}")
         return []
     finally:
-        if driver:
-            driver.quit()
+        driver_pool.release(driver)
 
 
-def _bucket(comps, r_min, r_max, d_min, d_max):
-    """Filter comps by distance and date ranges with error handling"""
-    filtered = []
-    for c in comps:
-        try:
-            # Safe date parsing
-            sold_date_str = c.get("soldDate", "")
-            if not sold_date_str:
-                continue
+# ── Comp bucketing ────────────────────────────────────────────
+# Distance rings (miles, each bucket is lo < dist <= hi) and sale-age bands
+# (days, each bucket is lo <= age < hi); every ring × band pair is a bucket.
+COMP_DISTANCE_EDGES = tuple(float(x) for x in os.environ.get("AUTOFILL_COMP_DISTANCE_EDGES", "0,0.5,1").split(","))
+COMP_AGE_EDGES = tuple(int(x) for x in os.environ.get("AUTOFILL_COMP_AGE_EDGES", "0,181,366").split(","))
 
-            # Handle different date formats
-            try:
-                if len(sold_date_str) >= 10:
-                    sold_date = date.fromisoformat(sold_date_str[:10])
-                else:
-                    # Try parsing other formats
-                    sold_date = datetime.strptime(sold_date_str, '%m/%d/%Y').date()
-            except:
-                continue  # Skip if date can't be parsed
 
-            days_old = (date.today() - sold_date).days
-            distance = c.get("dist", 0)
+@dataclass
+class CompBucket:
+    title: str
+    min_dist: float
+    max_dist: float
+    min_days: int
+    max_days: int
+    comps: list = field(default_factory=list)
 
-            # Validate distance and date values
-            if not isinstance(distance, (int, float)) or distance < 0:
-                continue
-            if not isinstance(days_old, int) or days_old < 0:
-                continue
 
-            in_distance_range = r_min < distance <= r_max
-            in_date_range = d_min <= days_old < d_max
+@dataclass
+class CompBucketing:
+    """Result of bucket_comps: the buckets plus the per-comp facts they were built from"""
+    buckets: list
+    valid: list             # comps that passed validation, in input order
+    days_old: list          # sale age in days per valid comp (None when the date didn't parse)
+    invalid_reasons: list
 
-            if in_distance_range and in_date_range:
-                filtered.append(c)
-        except Exception as e:
-            print(f"⚠️ Error filtering comp: {e}")
+
+_SOLD_DATE_FORMATS = ('%m/%d/%Y', '%b %d, %Y', '%B %d, %Y')
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_sold_date(value: str):
+    """date for a soldDate string ('YYYY-MM-DD…' or m/d/Y), None when unparseable"""
+    if len(value) >= 10:
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            pass
+    for fmt in _SOLD_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
             continue
+    return None
 
-    return filtered
 
+def _range_label(lo, hi, unit: str) -> str:
+    return f"≤{hi:g} {unit}" if lo == 0 else f"{lo:g}-{hi:g} {unit}"
 
-def log_comp_buckets(address: str, comps: list[dict]):
-    """Pretty-print the four requested buckets to stdout with error handling."""
-    # Filter out comps with missing essential data and debug why they're invalid
-    valid_comps = []
-    invalid_reasons = []
 
+def comp_bucket_grid(distance_edges=COMP_DISTANCE_EDGES, age_edges=COMP_AGE_EDGES) -> list[CompBucket]:
+    """Empty buckets for every distance ring × age band, nearest ring first"""
+    buckets = []
+    for i, (d_lo, d_hi) in enumerate(zip(distance_edges, distance_edges[1:])):
+        marker = "🔹" if i % 2 == 0 else "🔸"
+        for a_lo, a_hi in zip(age_edges, age_edges[1:]):
+            age = _range_label(round(a_lo / 30.4), round(a_hi / 30.4), "mo")
+            buckets.append(CompBucket(f"{marker} {_range_label(d_lo, d_hi, 'mi')} & {age}", d_lo, d_hi, a_lo, a_hi))
+    return buckets
+
+
+def _comp_invalid_reasons(comp: dict) -> list:
+    reasons = []
+    if not comp.get('address'):
+        reasons.append("no address")
+    if not comp.get('soldDate'):
+        reasons.append("no soldDate")
+    price = comp.get('price', 0)
+    if not isinstance(price, (int, float)) or price <= 0:
+        reasons.append(f"invalid price: {comp.get('price')}")
+    if not isinstance(comp.get('dist', 0), (int, float)):
+        reasons.append(f"invalid dist: {comp.get('dist')}")
+    return reasons
+
+
+def bucket_comps(comps: list[dict], distance_edges=COMP_DISTANCE_EDGES, age_edges=COMP_AGE_EDGES,
+                 today: date | None = None) -> CompBucketing:
+    """Validate each comp, parse its sale date once, and drop it into its distance × age bucket.
+
+    Bucket membership is computed for all comps at once with searchsorted over
+    the ring and band edges; comps within a bucket are sorted by $/sq ft, high
+    to low.
+    """
+    today = today or date.today()
+    valid, days_old, invalid_reasons = [], [], []
     for i, comp in enumerate(comps):
-        try:
-            # Debug each comp
-            reasons = []
-            if not comp.get('address'):
-                reasons.append("no address")
-            if not comp.get('soldDate'):
-                reasons.append("no soldDate")
-            if not isinstance(comp.get('price', 0), (int, float)) or comp.get('price', 0) <= 0:
-                reasons.append(f"invalid price: {comp.get('price')}")
-            if not isinstance(comp.get('dist', 0), (int, float)):
-                reasons.append(f"invalid dist: {comp.get('dist')}")
-
-            if reasons:
-                invalid_reasons.append(f"Comp {i + 1}: {', '.join(reasons)}")
-            else:
-                valid_comps.append(comp)
-        except Exception as e:
-            invalid_reasons.append(f"Comp {i + 1}: error checking - {e}")
+        reasons = _comp_invalid_reasons(comp)
+        if reasons:
+            invalid_reasons.append(f"Comp {i + 1}: {', '.join(reasons)}")
+            continue
+        sold = parse_sold_date(str(comp["soldDate"]))
+        valid.append(comp)
+        days_old.append((today - sold).days if sold else None)
+
+    buckets = comp_bucket_grid(distance_edges, age_edges)
+    if not valid:
+        return CompBucketing(buckets, valid, days_old, invalid_reasons)
+
+    dist = np.array([comp.get("dist", 0) for comp in valid], dtype=float)
+    age = np.array([-1 if d is None else d for d in days_old], dtype=float)
+    ring = np.searchsorted(np.asarray(distance_edges, dtype=float), dist, side="left") - 1
+    band = np.searchsorted(np.asarray(age_edges, dtype=float), age, side="right") - 1
+    n_rings, n_bands = len(distance_edges) - 1, len(age_edges) - 1
+    inside = (ring >= 0) & (ring < n_rings) & (band >= 0) & (band < n_bands) & (dist >= 0) & (age >= 0)
+
+    for i in np.flatnonzero(inside):
+        buckets[ring[i] * n_bands + band[i]].comps.append(valid[i])
+    for bucket in buckets:
+        bucket.comps.sort(key=lambda x: (x.get("ppsq") is None or x.get("ppsq", 0) <= 0, -(x.get("ppsq") or 0)))
+    return CompBucketing(buckets, valid, days_old, invalid_reasons)
+
+
+def log_comp_buckets(address: str, comps: list[dict]) -> CompBucketing:
+    """Pretty-print the comp buckets to stdout and return them."""
+    result = bucket_comps(comps)
 
     # Print debug info about invalid comps
-    if invalid_reasons:
+    if result.invalid_reasons:
         print(f"🚨 Invalid comps found:")
-        for reason in invalid_reasons[:5]:  # Show first 5
+        for reason in result.invalid_reasons[:5]:  # Show first 5
             print(f"   {reason}")
-        if len(invalid_reasons) > 5:
-            print(f"   ... and {len(invalid_reasons) - 5} more")
-
-    buckets = [
-        ("🔹 ≤0.5 mi & ≤6 mo", _bucket(valid_comps, 0, 0.5, 0, 181)),
-        ("🔹 ≤0.5 mi & 6-12 mo", _bucket(valid_comps, 0, 0.5, 181, 366)),
-        ("🔸 0.5-1 mi & ≤6 mo", _bucket(valid_comps, 0.5, 1, 0, 181)),
-        ("🔸 0.5-1 mi & 6-12 mo", _bucket(valid_comps, 0.5, 1, 181, 366)),
-    ]
-
-    print(f"🔍 Total comps available: {len(comps)} (valid: {len(valid_comps)})")
-    for i, comp in enumerate(valid_comps):
-        try:
-            days_old = (date.today() - date.fromisoformat(comp["soldDate"][:10])).days
-            price = comp.get('price', 0)
-            dist = comp.get('dist', 0)
-            address_short = comp.get('address', 'Unknown')[:30]
-            print(f"   Comp {i + 1}: {address_short}... | {dist:.2f}mi | {days_old} days old | ${price:,}")
-        except Exception as e:
-            print(f"   Comp {i + 1}: Error displaying comp data: {e}")
+        if len(result.invalid_reasons) > 5:
+            print(f"   ... and {len(result.invalid_reasons) - 5} more")
+
+    print(f"🔍 Total comps available: {len(comps)} (valid: {len(result.valid)})")
+    for i, (comp, days_old) in enumerate(zip(result.valid, result.days_old)):
+        price = comp.get('price', 0)
+        dist = comp.get('dist', 0)
+        address_short = comp.get('address', 'Unknown')[:30]
+        age = f"{days_old} days old" if days_old is not None else "unknown date"
+        print(f"   Comp {i + 1}: {address_short}... | {dist:.2f}mi | {age} | ${price:,}")
 
     print(f"\n🔍 Bucket results:")
-    for i, (title, bucket_comps) in enumerate(buckets, 1):
-        print(f"   Bucket {i} ({title.split('(')[0].strip()}): {len(bucket_comps)} items")
+    for i, bucket in enumerate(result.buckets, 1):
+        print(f"   Bucket {i} ({bucket.title}): {len(bucket.comps)} items")
 
     print("\n" + "═" * 65)
     print(f"🏠  COMPARABLE SALES AROUND: {address.upper()}")
     print("═" * 65)
 
-    for title, rows in buckets:
+    for bucket in result.buckets:
+        rows = bucket.comps
         if not rows:
             continue
-        # Safe sorting with None handling
-        rows.sort(key=lambda x: (x.get("ppsq") is None or x.get("ppsq", 0) <= 0, -x.get("ppsq", 0)))
-        print(f"\n{title}  ({len(rows)} found, sorted by $/sq ft ↓)")
+        print(f"\n{bucket.title}  ({len(rows)} found, sorted by $/sq ft ↓)")
         for i, c in enumerate(rows, 1):
             try:
                 ppsq = f"${c.get('ppsq', 0):.0f}/sf" if c.get('ppsq', 0) > 0 else "n/a"
@@ -1194,6 +3411,7 @@ def log_comp_buckets(address: str, comps: list[dict]):
             except Exception as e:
                 print(f"{i:>2}. Error displaying row: {e}")
     print("\n📋  End of comps\n" + "═" * 65 + "\n")
+    return result
 
 
 # Replace the original functions with enhanced versions
@@ -1224,25 +3442,26 @@ def parse_json_response(json_text: str, lat: float, lng: float, radius_miles: fl
                         break
 
         if homes_data:
+            located, lats, lngs = [], [], []
             for home in homes_data:
                 try:
                     if 'latLong' in home:
-                        home_lat = home['latLong']['latitude']
-                        home_lng = home['latLong']['longitude']
-
-                        distance = geodesic((lat, lng), (home_lat, home_lng)).miles
-
-                        if distance <= radius_miles:
-                            sold_homes.append({
-                                'lat': home_lat,
-                                'lng': home_lng,
-                                'distance': distance,
-                                'raw_data': home
-                            })
-
+                        home_lat, home_lng = api_home_lat_lng(home)
+                        lats.append(home_lat)
+                        lngs.append(home_lng)
+                        located.append(home)
                 except Exception as e:
                     continue
 
+            distances, mask = filter_within_radius(lat, lng, lats, lngs, radius_miles)
+            for i in np.flatnonzero(mask):
+                sold_homes.append({
+                    'lat': lats[i],
+                    'lng': lngs[i],
+                    'distance': float(distances[i]),
+                    'raw_data': located[i]
+                })
+
         print(f"✅ Parsed {len(sold_homes)} homes from JSON")
         return sold_homes
 
@@ -1256,21 +3475,24 @@ def search_redfin_simple_requests(address: str, days_back: int = 365) -> list:
     try:
         print("🔍 Trying simple requests approach...")
 
-        # Clean up the address for URL
-        clean_address = address.replace(",", "").replace(" ", "-").lower()
+        region = resolve_redfin_region(address)
+        if region is None:
+            print("⚠️ No Redfin region for this address, skipping region searches")
+            return []
 
         # Try different URL patterns that Redfin might use
+        gis_params = {"al": 1, **region.params(), "sold_within_days": days_back, "status": 9,
+                      "uipt": "1,2,3,4,5,6,7,8"}
         urls_to_try = [
-            f"https://www.redfin.com/city/7158/OH/Columbus/filter/include=sold-1yr,property-type=house",
-            f"https://www.redfin.com/zipcode/43224/filter/include=sold-1yr",
-            "https://www.redfin.com/stingray/api/gis?al=1&region_id=17151&region_type=6&sold_within_days=365&status=9&uipt=1,2,3,4,5,6,7,8",
-            f"https://www.redfin.com/city/7158/OH/Columbus/recently-sold"
+            f"{REDFIN_BASE_URL}{region.path}/filter/include=sold-1yr,property-type=house",
+            f"{REDFIN_BASE_URL}/stingray/api/gis?{urlencode(gis_params)}",
+            f"{REDFIN_BASE_URL}{region.path}/recently-sold"
         ]
 
         for url in urls_to_try:
             try:
                 print(f"📡 Trying: {url[:60]}...")
-                response = session.get(url, timeout=15)
+                response = http.get(url, timeout=15)
 
                 if response.status_code == 200:
                     content = response.text
@@ -1306,27 +3528,27 @@ def search_redfin_simple_requests(address: str, days_back: int = 365) -> list:
 
 
 def search_redfin_url(address):
-    """Search for a Redfin URL using DuckDuckGo"""
+    """Search for a Redfin URL using DuckDuckGo, served from the listing URL cache when possible"""
+    cached = listing_url_cache.get("redfin", address)
+    if cached:
+        print(f"💾 Cached Redfin listing: {cached}")
+        return cached
     print(f"🔍 Searching for Redfin listing: {address}")
-    return try_duckduckgo_search(address)
+    url = discover_listing_url("redfin", address)
+    if not url:
+        print("🌐 Browserless discovery failed, falling back to Chrome")
+        url = try_duckduckgo_search(address)
+    listing_url_cache.put("redfin", address, url)
+    return url
 
 
 def try_duckduckgo_search(address):
     """Try DuckDuckGo search for Redfin listing"""
     print(f"🦆 Searching with DuckDuckGo...")
 
-    options = Options()
-    options.add_argument("--headless=new")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument(
-        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36")
-
+    driver = None
     try:
-        service = ChromeService()
-        driver = webdriver.Chrome(service=service, options=options)
+        driver = driver_pool.acquire()
 
         # Try multiple search query formats for better results
         queries = [
@@ -1369,87 +3591,621 @@ def try_duckduckgo_search(address):
         print(f"⚠️ DuckDuckGo search failed: {e}")
         return None
     finally:
-        try:
-            driver.quit()
-        except:
-            pass
+        driver_pool.release(driver)
 
 
 def is_valid_redfin_url(url):
     """Check if a URL is a valid Redfin property URL"""
     if not url or not isinstance(url, str):
         return False
-    return url.startswith("http") and "redfin.com" in url and "/home/" in url
+    return url.startswith("http") and ("redfin.com" in url or url.startswith(REDFIN_BASE_URL)) and "/home/" in url
+
+
+def is_valid_zillow_url(url):
+    """Check if a URL is a valid Zillow property URL"""
+    if not url or not isinstance(url, str):
+        return False
+    return url.startswith("http") and ("zillow.com" in url or url.startswith(ZILLOW_BASE_URL)) and "/homedetails/" in url
+
+
+LISTING_URL_TTL_DAYS = float(os.environ.get("AUTOFILL_LISTING_URL_TTL_DAYS", "90"))
+
+
+class ListingUrlCache:
+    """On-disk address → listing URL cache per site, keyed by normalized address.
+
+    Only URLs that pass the site's validity check are stored or returned, and
+    entries older than the TTL are ignored, so a relisted property is
+    re-discovered eventually. Callers ``invalidate`` an entry whose page no
+    longer yields data.
+    """
+
+    VALIDATORS = {
+        "redfin": is_valid_redfin_url,
+        "zillow": is_valid_zillow_url,
+    }
+
+    def __init__(self, filename: str = "listing_urls.sqlite", ttl_days: float = LISTING_URL_TTL_DAYS):
+        self.ttl = ttl_days * 86400
+        self._filename = filename
+        self._conn = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "invalidated": 0}
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = _open_cache_db(self._filename)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS listing_urls (
+                    site TEXT NOT NULL,
+                    address_key TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (site, address_key)
+                )""")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, site: str, address: str):
+        """Cached listing URL for the address, or None"""
+        key = normalize_address(address)
+        if not key:
+            return None
+        with self._lock:
+            try:
+                row = self._db().execute("SELECT url, fetched_at FROM listing_urls WHERE site = ? AND address_key = ?",
+                                         (site, key)).fetchone()
+            except sqlite3.Error as e:
+                print(f"⚠️ Listing URL cache read failed: {e}")
+                row = None
+            if row is not None and time.time() - row[1] <= self.ttl and self.VALIDATORS[site](row[0]):
+                self.stats["hits"] += 1
+                return row[0]
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, site: str, address: str, url):
+        key = normalize_address(address)
+        if not key or not self.VALIDATORS[site](url):
+            return
+        with self._lock:
+            try:
+                self._db().execute("INSERT OR REPLACE INTO listing_urls (site, address_key, url, fetched_at) "
+                                   "VALUES (?, ?, ?, ?)", (site, key, url, time.time()))
+                self._db().commit()
+                self.stats["stores"] += 1
+            except sqlite3.Error as e:
+                print(f"⚠️ Listing URL cache write failed: {e}")
+
+    def invalidate(self, site: str, address: str):
+        key = normalize_address(address)
+        if not key:
+            return
+        with self._lock:
+            try:
+                deleted = self._db().execute("DELETE FROM listing_urls WHERE site = ? AND address_key = ?",
+                                             (site, key)).rowcount
+                self._db().commit()
+                self.stats["invalidated"] += deleted
+            except sqlite3.Error as e:
+                print(f"⚠️ Listing URL cache write failed: {e}")
+
+
+listing_url_cache = ListingUrlCache()
+
+
+# ── Browserless listing URL discovery ─────────────────────────
+DDG_HTML_URL = os.environ.get("AUTOFILL_DDG_HTML_URL", "https://html.duckduckgo.com/html/")
+ZILLOW_AUTOCOMPLETE_URL = os.environ.get("AUTOFILL_ZILLOW_AUTOCOMPLETE_URL",
+                                         "https://www.zillowstatic.com/autocomplete/v3/suggestions")
+DISCOVERY_TIMEOUT = 10
+
+_HREF_PATTERN = re.compile(r'<a\b[^>]*?\bhref="([^"]+)"', re.IGNORECASE)
+_discovery_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="discovery")
+atexit.register(_discovery_executor.shutdown, wait=False, cancel_futures=True)
+
+
+def parse_stingray_json(text: str):
+    """Decode a stingray response body, which Redfin prefixes with '{}&&'"""
+    text = text.strip()
+    if text.startswith("{}&&"):
+        text = text[4:]
+    return json.loads(text)
+
+
+def redfin_autocomplete(query: str) -> dict:
+    """Payload of Redfin's location-autocomplete endpoint for `query` ({} when it has none); raises on request errors"""
+    response = http.get(
+        f"{REDFIN_BASE_URL}/stingray/do/location-autocomplete",
+        params={"location": query, "start": 0, "count": 10, "v": 2},
+        timeout=DISCOVERY_TIMEOUT,
+    )
+    response.raise_for_status()
+    payload = parse_stingray_json(response.text).get("payload")
+    return payload if isinstance(payload, dict) else {}
+
+
+def _autocomplete_rows(payload: dict) -> list:
+    rows = []
+    if isinstance(payload.get("exactMatch"), dict):
+        rows.append(payload["exactMatch"])
+    for section in payload.get("sections") or []:
+        rows.extend(row for row in section.get("rows") or [] if isinstance(row, dict))
+    return rows
+
+
+def listing_matches_address(candidate: str, address: str) -> bool:
+    """True when a suggestion's text or URL names the same house as `address`.
+
+    The street number and every street-name word must appear in the
+    candidate, and so must the zip (else the city) when both sides name one;
+    a neighbouring house number or the same street in another town fails.
+    """
+    street, city, _, zip_code = split_address(address)
+    street_words = [word for word in normalize_address(street).split() if not word.startswith("#")]
+    if not street_words or not street_words[0][0].isdigit():
+        return False
+    # Listing ids in URLs ("/home/123", "123_zpid") are not house numbers
+    candidate = re.sub(r"/home/\d+|\d+_zpid", " ", unescape(str(candidate)))
+    words = set(normalize_address(candidate).split())
+    if not all(word in words for word in street_words):
+        return False
+    candidate_zips = {word for word in words if re.fullmatch(r"\d{5}", word)}
+    if zip_code and candidate_zips:
+        return zip_code in candidate_zips
+    city_words = normalize_address(city).split()
+    return all(word in words for word in city_words)
+
+
+def _redfin_url_from_autocomplete(address: str):
+    for row in _autocomplete_rows(redfin_autocomplete(address)):
+        url = row.get("url") or ""
+        if url.startswith("/"):
+            url = REDFIN_BASE_URL + url
+        described = f"{row.get('name') or ''} {row.get('subName') or ''} {urlparse(url).path}"
+        if is_valid_redfin_url(url) and listing_matches_address(described, address):
+            return url
+    return None
+
+
+def _zillow_url_from_autocomplete(address: str):
+    response = http.get(ZILLOW_AUTOCOMPLETE_URL, params={"q": address}, timeout=DISCOVERY_TIMEOUT)
+    if response.status_code != 200:
+        return None
+    for result in response.json().get("results") or []:
+        meta = result.get("metaData") or {}
+        described = result.get("display") or " ".join(
+            str(meta.get(key) or "") for key in ("streetNumber", "streetName", "city", "state", "zipCode"))
+        if meta.get("zpid") and listing_matches_address(described, address):
+            return f"{ZILLOW_BASE_URL}/homedetails/{meta['zpid']}_zpid/"
+    return None
+
+
+def search_result_links(html: str) -> list:
+    """Outbound result URLs from a search results page, unwrapping DuckDuckGo redirect links"""
+    links = []
+    for match in _HREF_PATTERN.finditer(html or ""):
+        href = unescape(match.group(1))
+        if href.startswith("//"):
+            href = "https:" + href
+        parsed = urlparse(href)
+        if parsed.path.startswith("/l/") and "uddg=" in parsed.query:
+            href = parse_qs(parsed.query).get("uddg", [""])[0]
+        if href.startswith("http"):
+            links.append(href)
+    return links
+
+
+def _ddg_html_search(query: str, is_valid, address: str):
+    response = http.get(DDG_HTML_URL, params={"q": query},
+                        headers={"User-Agent": _CHROME_USER_AGENT, **_HTML_HEADERS}, timeout=DISCOVERY_TIMEOUT)
+    if response.status_code != 200:
+        return None
+    for href in search_result_links(response.text):
+        # Listing URLs carry the address slug, so a result for a neighbouring house is skipped
+        if is_valid(href) and listing_matches_address(urlparse(href).path, address):
+            return href
+    return None
+
+
+def _discovery_strategies(site: str, address: str) -> dict:
+    if site == "redfin":
+        return {
+            "autocomplete": lambda: _redfin_url_from_autocomplete(address),
+            "search": lambda: _ddg_html_search(f"{address} site:redfin.com", is_valid_redfin_url, address),
+        }
+    return {
+        "autocomplete": lambda: _zillow_url_from_autocomplete(address),
+        "search": lambda: _ddg_html_search(f"{address} site:zillow.com", is_valid_zillow_url, address),
+    }
+
+
+def discover_listing_url(site: str, address: str):
+    """Find the listing URL for `address` on "redfin" or "zillow" without a browser.
+
+    The site's autocomplete endpoint and an HTML search results page are
+    queried in parallel and the first valid URL wins; None when both fail.
+    """
+    futures = {_discovery_executor.submit(fn): name for name, fn in _discovery_strategies(site, address).items()}
+    is_valid = ListingUrlCache.VALIDATORS[site]
+    for future in as_completed(futures):
+        try:
+            url = future.result()
+        except Exception as e:
+            print(f"⚠️ {site} {futures[future]} lookup failed: {e}")
+            continue
+        if is_valid(url):
+            if site == "zillow":
+                url = url.split("?")[0]
+            print(f"✅ Found {site} URL via {futures[future]}: {url}")
+            for other in futures:
+                other.cancel()
+            return url
+    return None
+
+
+# ── Redfin region resolution ──────────────────────────────────
+REGION_TTL_DAYS = float(os.environ.get("AUTOFILL_REGION_TTL_DAYS", "180"))
+REGION_NEGATIVE_TTL_DAYS = float(os.environ.get("AUTOFILL_REGION_NEGATIVE_TTL_DAYS", "1"))
+# Stingray region_type codes by the first path segment of an autocomplete row's URL
+_REDFIN_REGION_TYPES = {"neighborhood": 1, "zipcode": 2, "county": 5, "city": 6}
+
+
+@dataclass
+class RedfinRegion:
+    """A Redfin search region as stingray requests address it"""
+    region_id: int
+    region_type: int
+    name: str
+    path: str  # region page path, e.g. /zipcode/43224
+    market: str = ""
+
+    def params(self) -> dict:
+        params = {"region_id": str(self.region_id), "region_type": str(self.region_type)}
+        if self.market:
+            params["market"] = self.market
+        return params
+
+
+def region_lookup_key(address: str) -> str:
+    """Region cache key for an address: its zip, else its city and state ("" when it has neither)"""
+    _, city, state, zip_code = split_address(address)
+    if zip_code:
+        return f"zip:{zip_code}"
+    if city and state:
+        return f"city:{city.lower()}, {state.lower()}"
+    return ""
+
+
+def _region_from_autocomplete(row: dict):
+    """RedfinRegion for an autocomplete row that names a region (not a listing), else None"""
+    path = row.get("url") or ""
+    kind = path.strip("/").split("/")[0]
+    region_id = str(row.get("id") or "").rpartition("_")[2]
+    if kind not in _REDFIN_REGION_TYPES or not region_id.isdigit():
+        return None
+    return RedfinRegion(int(region_id), _REDFIN_REGION_TYPES[kind], row.get("name") or "", path,
+                        row.get("market") or "")
+
+
+def _reverse_geocode_zip(lat: float, lng: float) -> str:
+    """5-digit postcode at lat/lng from Nominatim, "" when it has none; raises on request errors"""
+    response = http.get(f"{NOMINATIM_URL}/reverse",
+                        params={"lat": lat, "lon": lng, "format": "jsonv2", "zoom": 16},
+                        headers={"User-Agent": "Mozilla/5.0 (compatible; PropertyComps/1.0)"},
+                        timeout=GEOCODE_PROVIDER_TIMEOUT)
+    response.raise_for_status()
+    postcode = str((response.json().get("address") or {}).get("postcode") or "")
+    return postcode[:5] if re.fullmatch(r"\d{5}(?:-\d{4})?", postcode) else ""
+
+
+class RegionCache:
+    """On-disk zip/city/point → Redfin region cache.
+
+    Regions practically never change, so entries live for REGION_TTL_DAYS.
+    Lookups that found no region are cached too (``get`` returns False for
+    them) with a shorter TTL, so an unknown zip or a point without a postcode
+    is not re-queried on every run.
+    """
+
+    def __init__(self, filename: str = "redfin_regions.sqlite", ttl_days: float = REGION_TTL_DAYS,
+                 negative_ttl_days: float = REGION_NEGATIVE_TTL_DAYS):
+        self.ttl = ttl_days * 86400
+        self.negative_ttl = negative_ttl_days * 86400
+        self._filename = filename
+        self._conn = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0, "stores": 0}
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = _open_cache_db(self._filename)
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS region_lookups (
+                    lookup_key TEXT PRIMARY KEY,
+                    region_id INTEGER,
+                    region_type INTEGER,
+                    name TEXT,
+                    path TEXT,
+                    market TEXT,
+                    resolved_at REAL NOT NULL
+                );
+                -- Positive-only cache superseded by region_lookups
+                DROP TABLE IF EXISTS regions;
+            """)
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str):
+        """Cached RedfinRegion for the lookup key, False for a cached miss, or None when not cached"""
+        with self._lock:
+            try:
+                row = self._db().execute("SELECT region_id, region_type, name, path, market, resolved_at "
+                                         "FROM region_lookups WHERE lookup_key = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                print(f"⚠️ Region cache read failed: {e}")
+                row = None
+            if row is not None and row[0] is None and time.time() - row[5] <= self.negative_ttl:
+                self.stats["negative_hits"] += 1
+                return False
+            if row is not None and row[0] is not None and time.time() - row[5] <= self.ttl:
+                self.stats["hits"] += 1
+                return RedfinRegion(*row[:5])
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, region):
+        """Store a RedfinRegion, or None to record that the key has no region"""
+        values = (region.region_id, region.region_type, region.name, region.path, region.market) if region \
+            else (None,) * 5
+        with self._lock:
+            try:
+                self._db().execute("INSERT OR REPLACE INTO region_lookups VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                   (key, *values, time.time()))
+                self._db().commit()
+                self.stats["stores"] += 1
+            except sqlite3.Error as e:
+                print(f"⚠️ Region cache write failed: {e}")
+
+
+region_cache = RegionCache()
+
+
+def _autocomplete_region(key: str):
+    """Region for a "zip:..." or "city:..." lookup key via location-autocomplete.
+
+    A miss is cached only when autocomplete answered without a region row;
+    request errors (429, 5xx, timeouts) propagate uncached.
+    """
+    cached = region_cache.get(key)
+    if cached is not None:
+        return cached or None
+
+    kind, _, query = key.partition(":")
+    wanted = "zipcode" if kind == "zip" else "city"
+    regions = [region for region in map(_region_from_autocomplete, _autocomplete_rows(redfin_autocomplete(query)))
+               if region is not None]
+    region = next((r for r in regions if r.path.strip("/").startswith(wanted)), regions[0] if regions else None)
+    if region is None:
+        print(f"⚠️ No Redfin region found for {query}")
+    else:
+        print(f"🗺️ Redfin region for {query}: {region.name} ({region.region_type}_{region.region_id})")
+    region_cache.put(key, region)
+    return region
+
+
+def resolve_redfin_region(address: str = "", lat: float = None, lng: float = None):
+    """Redfin region (zip, else city) containing an address or point; None when it cannot be resolved.
+
+    The zip or city comes from the address when it has one, otherwise from
+    a reverse geocode of lat/lng. Results, including misses, are cached on
+    disk per zip or city and per point (rounded to ~100 m), so neither the
+    autocomplete call nor the reverse geocode repeats for the same area.
+    """
+    try:
+        key = region_lookup_key(address) if address else ""
+        if key:
+            return _autocomplete_region(key)
+        if lat is None or lng is None:
+            return None
+
+        point_key = f"point:{lat:.3f},{lng:.3f}"
+        cached = region_cache.get(point_key)
+        if cached is not None:
+            return cached or None
+        zip_code = _reverse_geocode_zip(lat, lng)
+        region = _autocomplete_region(f"zip:{zip_code}") if zip_code else None
+        region_cache.put(point_key, region)
+        return region
+    except Exception as e:
+        print(f"⚠️ Redfin region lookup failed: {e}")
+        return None
+
+
+# Markers of an interstitial/bot-check page instead of the real listing
+_BOT_WALL_MARKERS = ("px-captcha", "captcha-delivery", "g-recaptcha", "are you a human", "verify you are human",
+                     "unusual traffic", "access to this page has been denied", "request unsuccessful")
+_HTML_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "none",
+}
+REDFIN_PROPERTY_TYPE_LABEL = "property type + bd/bt/garage (example: SFR 3/2/1)"
+
+
+def is_bot_wall(html: str) -> bool:
+    """True when the HTML looks like a captcha/denied page rather than content"""
+    head = (html or "")[:20000].lower()
+    return any(marker in head for marker in _BOT_WALL_MARKERS)
+
+
+def fetch_page_http(url: str):
+    """Plain HTTP GET of a page through the shared HTTP client; None on failure or bot wall"""
+    try:
+        response = http.get(url, headers={"User-Agent": _CHROME_USER_AGENT, **_HTML_HEADERS}, timeout=15)
+    except Exception as e:
+        print(f"⚠️ HTTP fetch failed: {e}")
+        return None
+    if response.status_code != 200:
+        print(f"⚠️ HTTP fetch returned {response.status_code}")
+        return None
+    if is_bot_wall(response.text):
+        print("🧱 HTTP fetch hit a bot wall")
+        return None
+    return PageSnapshot(response.text, response.url)
+
+
+_TITLE_TAG = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+
+
+def listing_url_is_wrong(url: str, address: str) -> bool:
+    """True only when the listing page proves `url` no longer belongs to `address`.
+
+    That is a 404/410 (removed listing), a redirect away from any listing
+    page (e.g. to a search), or a page whose title names a different
+    property. Timeouts, other errors, bot walls and titles without an
+    address prove nothing and return False, so a transient scrape failure
+    never evicts a good cached URL.
+    """
+    try:
+        response = http.get(url, headers={"User-Agent": _CHROME_USER_AGENT, **_HTML_HEADERS}, timeout=15)
+    except Exception as e:
+        print(f"⚠️ Listing check failed: {e}")
+        return False
+    if response.status_code in (404, 410):
+        return True
+    if response.status_code != 200 or is_bot_wall(response.text):
+        return False
+    final_url = response.url or url
+    if not (is_valid_redfin_url(final_url) or is_valid_zillow_url(final_url)):
+        return True
+    title = _TITLE_TAG.search(response.text[:50000])
+    title = unescape(title.group(1)).strip() if title else ""
+    if not re.match(r"\d+\s+\S", title):
+        return False
+    return not listing_matches_address(title, address)
+
+
+def _redfin_fields_complete(data: dict) -> bool:
+    """The fast path is good enough when price, sqft, beds and baths all parsed"""
+    property_type = data.get(REDFIN_PROPERTY_TYPE_LABEL, "?")
+    return bool(data.get("asking price (PP)")) and bool(data.get("sqft")) and "?" not in property_type
 
 
 def get_redfin_data(url):
+    """Scrape a Redfin listing: plain HTTP first, pooled headless browser only if that falls short.
+
+    The returned dict carries a ``_provenance`` map of field → tier ("http"
+    or "browser") recording which tier produced each value.
+    """
     print(f"🌐 Scraping Redfin data: {url}")
-    options = Options()
-    options.add_argument("--headless=new")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument(
-        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36")
 
-    data = {}
+    # Tier 1: plain HTTP fetch, no browser
+    http_data = {}
+    page = fetch_page_http(url)
+    if page is not None:
+        print("⚡ Parsing Redfin page fetched over HTTP...")
+        http_data = extract_redfin_data(page)
+        if _redfin_fields_complete(http_data):
+            print("✅ HTTP fast path succeeded, skipping browser")
+            http_data["_provenance"] = {key: "http" for key in http_data}
+            return http_data
+        print("⚠️ HTTP fast path incomplete, escalating to browser")
+
+    # Tier 2: headless browser
+    browser_data = _get_redfin_data_browser(url)
+
+    # Browser values win; the HTTP tier fills anything the browser missed
+    data = dict(browser_data)
+    provenance = {key: "browser" for key in browser_data}
+    for key, value in http_data.items():
+        if key not in data or (key == REDFIN_PROPERTY_TYPE_LABEL and "?" in data[key] and "?" not in value):
+            data[key] = value
+            provenance[key] = "http"
+    if data:
+        data["_provenance"] = provenance
+    return data
+
+
+def _get_redfin_data_browser(url):
+    """Load the listing in a pooled browser and extract from one page snapshot"""
+    archived = load_page_snapshot(url)
+    if archived is not None or snapshot_archive.replaying:
+        return extract_redfin_data(archived) if archived is not None else {}
+
+    driver = None
     try:
-        service = ChromeService()
-        driver = webdriver.Chrome(service=service, options=options)
+        driver = driver_pool.acquire()
         driver.get(url)
 
-        wait = WebDriverWait(driver, 15)
-
-        # --- Price ---
+        # The price block is the last piece of the listing to render
         try:
-            price_el = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "[data-rf-test-id='abp-price']")))
-            price_text = price_el.text.strip()
-            match = re.search(r"\$([\d,]+)", price_text)
-            if match:
-                price_numeric = int(match.group(1).replace(",", ""))
-                data["asking price (PP)"] = price_numeric
-                print(f"💰 Price: ${price_numeric:,}")
-            else:
-                print("⚠️ Could not extract numeric price")
+            WebDriverWait(driver, 15).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "[data-rf-test-id='abp-price']")))
         except Exception as e:
             print(f"⚠️ Price not found: {e}")
 
+        # Serialize the DOM once; every extractor reads from this snapshot
+        return extract_redfin_data(PageSnapshot.from_driver(driver))
+
+    except Exception as e:
+        print(f"❌ Failed to scrape Redfin: {e}")
+        return {}
+    finally:
+        driver_pool.release(driver)
+
+
+def extract_redfin_data(page: "PageSnapshot") -> dict:
+    """Extract the deal-sheet fields from a Redfin listing page snapshot"""
+    data = {}
+    try:
+        # --- Price: the rendered price element, the subject's embedded listing as fallback ---
+        price_el = page.select_one("[data-rf-test-id='abp-price']")
+        match = re.search(r"\$([\d,]+)", price_el.get_text(" ", strip=True)) if price_el is not None else None
+        if match:
+            price_numeric = int(match.group(1).replace(",", ""))
+            data["asking price (PP)"] = price_numeric
+            print(f"💰 Price: ${price_numeric:,}")
+        else:
+            try:
+                record_price = page.redfin_record.price
+            except Exception as e:
+                print(f"⚠️ JSON price extraction failed: {e}")
+                record_price = None
+            if record_price is not None:
+                data["asking price (PP)"] = record_price
+                print(f"💰 Price (from JSON): ${record_price:,}")
+            elif price_el is not None:
+                print("⚠️ Could not extract numeric price")
+            else:
+                print("⚠️ Price not found")
+
         # --- Beds / Baths / SqFt / Garage - Enhanced extraction ---
         beds = None
         baths = None
         sqft = None
         garage = None
 
-        # Try to extract from JSON data first (most reliable)
+        # Try the subject's record from the embedded page state first (most reliable)
+        record = RedfinPropertyRecord()
         try:
-            json_match = re.search(r'"beds"\s*:\s*(\d+)', driver.page_source)
-            if json_match:
-                beds = json_match.group(1)
+            record = page.redfin_record
+            if record.beds is not None:
+                beds = str(int(record.beds))
                 print(f"🛏️ Beds (from JSON): {beds}")
 
-            json_match = re.search(r'"baths"\s*:\s*([\d.]+)', driver.page_source)
-            if json_match:
-                baths = json_match.group(1)
+            if record.baths is not None:
+                baths = str(int(record.baths)) if record.baths == int(record.baths) else str(record.baths)
                 print(f"🛁 Baths (from JSON): {baths}")
 
-            json_match = re.search(r'"sqFt"\s*:\s*(\d+)', driver.page_source)
-            if json_match:
-                sqft = int(json_match.group(1))
+            if record.sq_ft is not None:
+                sqft = record.sq_ft
                 print(f"📏 SqFt (from JSON): {sqft}")
 
-            # Try to find garage in JSON
-            garage_patterns = [
-                r'"garage"\s*:\s*(\d+)',
-                r'"garageSpaces"\s*:\s*(\d+)',
-                r'"parkingSpaces"\s*:\s*(\d+)'
-            ]
-            for pattern in garage_patterns:
-                garage_match = re.search(pattern, driver.page_source)
-                if garage_match:
-                    garage = garage_match.group(1)
-                    print(f"🚗 Garage (from JSON): {garage}")
-                    break
+            if record.garage is not None:
+                garage = str(record.garage)
+                print(f"🚗 Garage (from JSON): {garage}")
 
         except Exception as e:
             print(f"⚠️ JSON extraction failed: {e}")
@@ -1458,8 +4214,8 @@ def get_redfin_data(url):
         if not all([beds, baths, sqft]):
             try:
                 # Enhanced statsValue parsing - get all stat values
-                facts_block = driver.find_elements(By.CSS_SELECTOR, ".statsValue")
-                clean_values = [v.text.strip() for v in facts_block if v.text.strip() and "$" not in v.text]
+                facts_block = [v.get_text(strip=True) for v in page.select(".statsValue")]
+                clean_values = [v for v in facts_block if v and "$" not in v]
                 print(f"📊 Found stats values: {clean_values}")
 
                 # IMPROVED LOGIC: Try to identify beds/baths/sqft more reliably
@@ -1507,14 +4263,14 @@ def get_redfin_data(url):
                     bed_selectors = [
                         "[data-rf-test-id='abp-beds']",
                         ".beds .statsValue",
-                        "[class*='bed']",
-                        "span:contains('bed')",
-                        "div:contains('bed')"
+                        "[class*='bed']"
                     ]
                     for selector in bed_selectors:
                         try:
-                            bed_el = driver.find_element(By.CSS_SELECTOR, selector)
-                            bed_text = bed_el.text.strip()
+                            bed_el = page.select_one(selector)
+                            if bed_el is None:
+                                continue
+                            bed_text = bed_el.get_text(" ", strip=True)
                             bed_match = re.search(r'(\d+)', bed_text)
                             if bed_match and 1 <= int(bed_match.group(1)) <= 10:
                                 beds = bed_match.group(1)
@@ -1528,15 +4284,15 @@ def get_redfin_data(url):
                     bath_selectors = [
                         "[data-rf-test-id='abp-baths']",
                         ".baths .statsValue",
-                        "[class*='bath']",
-                        "span:contains('bath')",
-                        "div:contains('bath')"
+                        "[class*='bath']"
                     ]
 
                     for selector in bath_selectors:
                         try:
-                            bath_el = driver.find_element(By.CSS_SELECTOR, selector)
-                            bath_text = bath_el.text.strip()
+                            bath_el = page.select_one(selector)
+                            if bath_el is None:
+                                continue
+                            bath_text = bath_el.get_text(" ", strip=True)
                             # Look for patterns like "2 bath", "2.5 baths", "2 full baths"
                             bath_patterns = [
                                 r'(\d+\.?\d*)\s*(?:full\s*)?baths?',
@@ -1568,8 +4324,7 @@ def get_redfin_data(url):
                     # Additional strategy: Look for bath info in page text
                     if not baths:
                         try:
-                            soup = BeautifulSoup(driver.page_source, "html.parser")
-                            page_text = soup.get_text().lower()
+                            page_text = page.text_lower
 
                             # Look for patterns in the full page text
                             bath_text_patterns = [
@@ -1608,8 +4363,10 @@ def get_redfin_data(url):
                     ]
                     for selector in sqft_selectors:
                         try:
-                            sqft_el = driver.find_element(By.CSS_SELECTOR, selector)
-                            sqft_text = sqft_el.text.strip()
+                            sqft_el = page.select_one(selector)
+                            if sqft_el is None:
+                                continue
+                            sqft_text = sqft_el.get_text(" ", strip=True)
                             sqft_clean = re.sub(r"[^\d]", "", sqft_text)
                             if sqft_clean.isdigit() and int(sqft_clean) > 100:
                                 sqft = int(sqft_clean)
@@ -1625,8 +4382,8 @@ def get_redfin_data(url):
         if not garage:
             try:
                 # Look for garage in property features/details
-                soup = BeautifulSoup(driver.page_source, "html.parser")
-                page_text = soup.get_text().lower()
+                soup = page.soup
+                page_text = page.text_lower
 
                 # Search for garage patterns in text
                 garage_patterns = [
@@ -1688,7 +4445,7 @@ def get_redfin_data(url):
 
         # FIXED: Use the exact label from the Excel sheet
         property_type_str = f"{property_type_parts[0]} {property_type_parts[1]}/{property_type_parts[2]}/{property_type_parts[3]}"
-        data["property type + bd/bt/garage (example: SFR 3/2/1)"] = property_type_str
+        data[REDFIN_PROPERTY_TYPE_LABEL] = property_type_str
         print(f"🏠 Property type: {property_type_str}")
 
         # --- ENHANCED Agent Information Extraction ---
@@ -1696,12 +4453,18 @@ def get_redfin_data(url):
             agent_name = None
             agent_email = None
 
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            page_source = driver.page_source
+            soup = page.soup
+            page_source = page.html
 
             print("🔍 Starting enhanced agent contact extraction...")
 
             # Method 1: Look for agent information in structured data/JSON
+            agent_name = record.agent_name
+            agent_email = record.agent_email
+            if agent_name:
+                print(f"👤 Agent name (from JSON): {agent_name}")
+            if agent_email:
+                print(f"📧 Agent email (from JSON): {agent_email}")
             try:
                 # Common JSON patterns for agent data
                 agent_json_patterns = [
@@ -1713,7 +4476,7 @@ def get_redfin_data(url):
                     r'"fullName"\s*:\s*"([^"]+)".*?"isAgent"\s*:\s*true'
                 ]
 
-                for pattern in agent_json_patterns:
+                for pattern in agent_json_patterns if not agent_name else []:
                     match = re.search(pattern, page_source, re.DOTALL)
                     if match:
                         potential_name = match.group(1).strip()
@@ -1724,7 +4487,7 @@ def get_redfin_data(url):
                             break
 
                 # Look for email in JSON
-                if agent_name:
+                if agent_name and not agent_email:
                     # Look for email associated with the agent
                     email_patterns = [
                         rf'"{re.escape(agent_name)}".*?"email"\s*:\s*"([^"]+@[^"]+)"',
@@ -1757,9 +4520,9 @@ def get_redfin_data(url):
 
                     for selector in agent_selectors:
                         try:
-                            agent_elements = driver.find_elements(By.CSS_SELECTOR, selector)
+                            agent_elements = page.select(selector)
                             for element in agent_elements:
-                                element_text = element.text.strip()
+                                element_text = element.get_text("\n", strip=True)
                                 if len(element_text) < 10:  # Skip very short elements
                                     continue
 
@@ -1813,7 +4576,7 @@ def get_redfin_data(url):
             # Method 3: Search page text for email patterns
             if not agent_email:
                 try:
-                    page_text = soup.get_text()
+                    page_text = page.text
                     # Find all emails in page
                     all_emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', page_text)
 
@@ -1844,7 +4607,7 @@ def get_redfin_data(url):
             # Method 4: Fallback name extraction from page text
             if not agent_name:
                 try:
-                    page_text = soup.get_text()
+                    page_text = page.text
 
                     # Look for "Listed by" or similar patterns in full page text
                     name_patterns = [
@@ -1893,14 +4656,11 @@ def get_redfin_data(url):
         # --- Lot Size ---
         try:
             # Try to extract lot size from JSON data
-            lot_match = re.search(r'"lotSize"\s*:\s*(\d+)', driver.page_source)
-            if lot_match:
-                data["lot size"] = int(lot_match.group(1))
+            if record.lot_size is not None:
+                data["lot size"] = record.lot_size
                 print(f"🏞️ Lot Size (from JSON): {data['lot size']}")
             else:
                 # Try to find lot size in HTML
-                soup = BeautifulSoup(driver.page_source, "html.parser")
-
                 # Look for lot size patterns
                 lot_patterns = [
                     r"Lot Size\s*:?\s*([0-9,]+)\s*sq\s*ft",
@@ -1908,7 +4668,7 @@ def get_redfin_data(url):
                     r"([0-9,]+)\s*sq\s*ft\s*lot",
                 ]
 
-                page_text = soup.get_text()
+                page_text = page.text
                 for pattern in lot_patterns:
                     match = re.search(pattern, page_text, re.IGNORECASE)
                     if match:
@@ -1923,13 +4683,12 @@ def get_redfin_data(url):
         # --- Year Built ---
         try:
             # First try to find year built in JSON data
-            year_match = re.search(r'"yearBuilt"\s*:\s*(\d{4})', driver.page_source)
-            if year_match:
-                data["year built"] = year_match.group(1)
+            if record.year_built is not None and 1700 < record.year_built < 2100:
+                data["year built"] = str(record.year_built)
                 print(f"🏗 Year Built (from JSON): {data['year built']}")
             else:
                 # Fallback to HTML parsing
-                soup = BeautifulSoup(driver.page_source, "html.parser")
+                soup = page.soup
 
                 # Try different methods to find year built
                 spans = soup.find_all("span", string=re.compile(r"Year Built", re.IGNORECASE))
@@ -1959,32 +4718,31 @@ def get_redfin_data(url):
         return data
 
     except Exception as e:
-        print(f"❌ Failed to scrape Redfin: {e}")
-        return {}
-    finally:
-        try:
-            driver.quit()
-        except:
-            pass
+        print(f"❌ Failed to parse Redfin page: {e}")
+        return data
 
 
 def search_zillow_url(address):
-    """Return the first Zillow property URL found for `address` (no API key)."""
+    """Return the Zillow property URL for `address`, from the listing URL cache or a search"""
+    cached = listing_url_cache.get("zillow", address)
+    if cached:
+        print(f"💾 Cached Zillow listing: {cached}")
+        return cached
     print(f"🔍 Searching Zillow listing: {address}")
-    options = Options()
-    options.add_argument("--headless=new")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument(
-        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
-    )
+    url = discover_listing_url("zillow", address)
+    if not url:
+        print("🌐 Browserless discovery failed, falling back to Chrome")
+        url = _search_zillow_url_browser(address)
+    listing_url_cache.put("zillow", address, url)
+    return url
+
 
+def _search_zillow_url_browser(address):
+    """Return the first Zillow property URL found for `address` via DuckDuckGo in Chrome (no API key)."""
+
+    driver = None
     try:
-        service = ChromeService()
-        driver = webdriver.Chrome(service=service, options=options)
+        driver = driver_pool.acquire()
 
         queries = [
             f"{address} site:zillow.com",
@@ -2006,11 +4764,11 @@ def search_zillow_url(address):
                 pass
         print("❌ Zillow link not found.")
         return None
+    except Exception as e:
+        print(f"⚠️ Zillow search failed: {e}")
+        return None
     finally:
-        try:
-            driver.quit()
-        except:
-            pass
+        driver_pool.release(driver)
 
 
 def get_zillow_data(url):
@@ -2018,34 +4776,148 @@ def get_zillow_data(url):
     Enhanced Zillow scraper with better debugging and more extraction methods.
     """
     print(f"🌐 Scraping Zillow data: {url}")
-    options = Options()
-    options.add_argument("--headless=new")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument(
-        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
-    )
 
-    data = {}
+    archived = load_page_snapshot(url)
+    if archived is not None or snapshot_archive.replaying:
+        return extract_zillow_data(archived) if archived is not None else {}
+
+    # Plain HTTP first; Zillow often answers with a bot wall, then the browser is needed
+    page = fetch_page_http(url)
+    if page is not None:
+        data = extract_zillow_data(page)
+        if ZILLOW_ARV_LABEL in data and ZILLOW_RENT_LABEL in data:
+            print("✅ HTTP fast path succeeded, skipping browser")
+            return data
+        print("⚠️ HTTP fast path incomplete, escalating to browser")
+
+    driver = None
     try:
-        service = ChromeService()
-        driver = webdriver.Chrome(service=service, options=options)
+        driver = driver_pool.acquire()
         driver.get(url)
         WebDriverWait(driver, 15).until(
             EC.presence_of_element_located((By.TAG_NAME, "body"))
         )
 
-        # Add extra wait for dynamic content
-        time.sleep(3)
+        # Wait for dynamic content to finish loading instead of a fixed sleep
+        wait_for_network_idle(driver, timeout=10)
+
+        page = PageSnapshot.from_driver(driver)
+        data = extract_zillow_data(page)
+
+        # ── Final results ──────────────────────────────────────
+        if data:
+            print(f"✅ Successfully extracted {len(data)} values from Zillow")
+        else:
+            print("❌ No data extracted from Zillow")
+            # Keep the page for debugging (every failure is kept, not just the last)
+            if not snapshot_archive.recording:
+                path = snapshot_archive.record_page(page, requested_url=url, kind="debug")
+                print(f"🐛 Saved HTML to {path} for debugging")
+
+        return data
+
+    except Exception as e:
+        print(f"⚠️ Zillow scrape failed: {e}")
+        return {}
+    finally:
+        driver_pool.release(driver)
+
+
+ZILLOW_ARV_LABEL = "ARV estimated/appraised"
+ZILLOW_RENT_LABEL = "market rent"
+
+
+def _zillow_cache_properties(cache):
+    """Yield the 'property' dicts held in a Zillow gdpClientCache/apiCache mapping"""
+    if isinstance(cache, str):
+        try:
+            cache = json.loads(cache)
+        except ValueError:
+            return
+    if not isinstance(cache, dict):
+        return
+    for entry in cache.values():
+        if isinstance(entry, dict):
+            prop = entry.get("property")
+            if isinstance(prop, dict):
+                yield prop
+
+
+def _decode_script_by_id(html: str, script_id: str):
+    """Decode the JSON body of <script id="script_id">, if present"""
+    pos = html.find(f'id="{script_id}"')
+    if pos < 0:
+        return None
+    close = html.find(">", pos)
+    if close < 0:
+        return None
+    return _decode_json_at(html, close + 1)
+
+
+def locate_zillow_property(page: "PageSnapshot"):
+    """Find the listing's property record in Zillow's data cache by path, or None.
+
+    Looks at __NEXT_DATA__ → props.pageProps.componentProps.gdpClientCache
+    (current pages) and hdpApolloPreloadedData → apiCache (older pages),
+    preferring the entry whose zpid matches the URL.
+    """
+    match = re.search(r"/(\d+)_zpid", page.url or "")
+    zpid = match.group(1) if match else None
+
+    candidates = []
+    next_data = _decode_script_by_id(page.html, "__NEXT_DATA__")
+    if isinstance(next_data, dict):
+        page_props = next_data.get("props", {}).get("pageProps", {})
+        for cache in (page_props.get("componentProps", {}).get("gdpClientCache"), page_props.get("gdpClientCache")):
+            candidates.extend(_zillow_cache_properties(cache))
+
+    if not candidates:
+        apollo = _decode_script_by_id(page.html, "hdpApolloPreloadedData")
+        if isinstance(apollo, dict):
+            candidates.extend(_zillow_cache_properties(apollo.get("apiCache")))
+
+    if not candidates:
+        return None
+    if zpid:
+        for prop in candidates:
+            if str(prop.get("zpid")) == zpid:
+                return prop
+    return candidates[0]
+
+
+def extract_zillow_data(page: "PageSnapshot") -> dict:
+    """Zestimate / Rent Zestimate from a Zillow page snapshot.
+
+    Reads the property's data cache directly and stops there when both values
+    are present; the HTML heuristics only run for whatever is still missing.
+    """
+    print("🔍 Starting Zillow data extraction...")
+    data = {}
+
+    prop = locate_zillow_property(page)
+    if prop is not None:
+        zestimate = _record_number(prop.get("zestimate"), int)
+        rent = _record_number(prop.get("rentZestimate"), int)
+        if zestimate and zestimate > 10000:
+            data[ZILLOW_ARV_LABEL] = zestimate
+            print(f"🏷️ Zestimate (data cache) → ${zestimate:,}")
+        if rent and 500 < rent < 10000:
+            data[ZILLOW_RENT_LABEL] = rent
+            print(f"💸 Rent Zestimate (data cache) → ${rent:,}")
+
+    if ZILLOW_ARV_LABEL in data and ZILLOW_RENT_LABEL in data:
+        return data
 
-        html = driver.page_source
-        soup = BeautifulSoup(html, "html.parser")
+    print("🔍 Data cache incomplete, falling back to page heuristics...")
+    _extract_zillow_heuristics(page, data)
+    return data
 
-        print("🔍 Starting Zillow data extraction...")
 
+def _extract_zillow_heuristics(page: "PageSnapshot", data: dict):
+    """Last-resort extraction: script JSON deep search, CSS selectors, regexes, page-text price analysis"""
+    html = page.html
+    soup = page.soup
+    try:
         # ── Enhanced helper functions ──────────────────────────
         def _extract_number(text):
             """Extract number from text like '$123,456' or '123456'"""
@@ -2228,7 +5100,7 @@ def get_zillow_data(url):
         if not data:
             print("🔍 Trying Method 4: Full page text analysis...")
             try:
-                page_text = soup.get_text()
+                page_text = page.text
 
                 # Look for dollar amounts in reasonable ranges
                 all_prices = re.findall(r'\$[\d,]+', page_text)
@@ -2267,79 +5139,44 @@ def get_zillow_data(url):
             except Exception as e:
                 print(f"⚠️ Text analysis failed: {e}")
 
-        # ── Final results ──────────────────────────────────────
-        if data:
-            print(f"✅ Successfully extracted {len(data)} values from Zillow")
-        else:
-            print("❌ No data extracted from Zillow")
-            # Save HTML for debugging
-            with open("zillow_debug.html", "w", encoding="utf-8") as f:
-                f.write(html)
-                print("🐛 Saved HTML to zillow_debug.html for debugging")
-
-        return data
-
     except Exception as e:
-        print(f"⚠️ Zillow scrape failed: {e}")
-        return {}
-    finally:
-        try:
-            driver.quit()
-        except:
-            pass
+        print(f"⚠️ Zillow heuristics failed: {e}")
 
 
-def autofill_column(file_path, col_letter):
-    print(f"📄 Opening workbook: {file_path}")
-    wb = load_workbook(file_path, keep_vba=True)
-    ws = wb.active
-
-    col_idx = column_index_from_string(col_letter)
-    print(f"🧩 Targeting column '{col_letter}' (index {col_idx})")
-
-    # Always grab the address from row 1 (needed for Zillow too)
-    address_cell = ws.cell(row=1, column=col_idx)
-    address = str(address_cell.value).strip() if address_cell.value else ""
+# Run the Redfin, Zillow and comps branches of autofill_column in parallel
+CONCURRENT_BRANCHES = os.environ.get("AUTOFILL_CONCURRENT", "1") != "0"
 
-    # Check if there's already a valid Redfin link in row 3
-    link_cell = ws.cell(row=3, column=col_idx)
-    existing_link = str(link_cell.value).strip() if link_cell.value else ""
 
+def _fetch_redfin_branch(address, existing_link):
+    """Resolve the Redfin listing link (searching if needed) and scrape it"""
     if is_valid_redfin_url(existing_link):
         print(f"✅ Found existing valid Redfin link: {existing_link}")
         link = existing_link
+        listing_url_cache.put("redfin", address, link)
     else:
-        print("🔍 No valid link found, searching for address...")
-        if not address or address.lower() == "none":
-            print("❌ No address found in row 1")
-            return
-
         print(f"🏠 Found address: {address}")
         link = search_redfin_url(address)
         if not link:
             print("❌ Could not find Redfin listing for this address")
-            return
-
-        # Update the link cell only if it was empty
-        if not existing_link:
-            link_cell.value = link
-            link_cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-            link_cell.fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
-            print(f"✅ Updated empty link cell with: {link}")
+            return None, {}
 
     print(f"🔗 Using link: {link}")
 
     if not is_valid_redfin_url(link):
         print(f"⚠️ Invalid or unsupported link: {link}")
-        return
+        return None, {}
 
     # Get Redfin data
     print("🔍 Extracting Redfin data...")
-    info = get_redfin_data(link)
+    data = get_redfin_data(link)
+    if not data and listing_url_is_wrong(link, address):
+        print("🗑️ Cached Redfin link no longer matches this address")
+        listing_url_cache.invalidate("redfin", address)
+    return link, data
 
-    # ──────────────────────────────────────────────────────────
-    # 🌟 ENHANCED: Fetch ARV & rent numbers from Zillow with better error handling
-    # ──────────────────────────────────────────────────────────
+
+def _fetch_zillow_branch(address):
+    """Fetch ARV & rent numbers from Zillow"""
     print("🔍 Searching for Zillow listing...")
     zillow_url = search_zillow_url(address)
     if zillow_url:
@@ -2348,18 +5185,26 @@ def autofill_column(file_path, col_letter):
         zillow_info = get_zillow_data(zillow_url)
         if zillow_info:
             print(f"✅ Zillow data extracted: {zillow_info}")
-            # Merge Zillow data into main info
-            info.update(zillow_info)
-        else:
-            print("⚠️ No data returned from Zillow")
+            return zillow_info
+        print("⚠️ No data returned from Zillow")
+        if listing_url_is_wrong(zillow_url, address):
+            print("🗑️ Cached Zillow link no longer matches this address")
+            listing_url_cache.invalidate("zillow", address)
     else:
         print("⚠️ Zillow link not found – ARV & rent will stay blank if labels exist.")
+    return {}
 
-    if not info:
-        print("⚠️ No data returned from either source.")
-        return
 
-    print(f"🎯 Total data available: {info}")
+def _fetch_comps_branch(address):
+    """Fetch comparable sales around the subject address"""
+    print("🔍 Attempting to fetch real comparables...")
+    return get_redfin_comps(address, radius_miles=1, sold_within_days=365)
+
+
+def _write_info_to_column(ws, col_idx, info):
+    """Fill the labelled rows of the target column from the scraped info"""
+    # Bookkeeping entries such as _provenance are never written to the sheet
+    info = {k: v for k, v in info.items() if not k.startswith("_")}
 
     # First, let's see what labels exist in the Excel file
     excel_labels = []
@@ -2426,7 +5271,9 @@ def autofill_column(file_path, col_letter):
     else:
         print(f"✅ Filled {fields_found} fields.")
 
-    # Continue with the rest of the function (copying from column B, saving, etc.)
+
+def _copy_template_column(ws, col_idx, col_letter):
+    """Copy empty cells from column B including formulas and fill colors"""
     print(f"🔄 Copying empty cells from column B to column {col_letter} including formulas and fill colors...")
     for row in range(4, 100):
         source_cell = ws.cell(row=row, column=2)  # Column B
@@ -2456,33 +5303,281 @@ def autofill_column(file_path, col_letter):
 
     print("✅ Finished copying values and formatting from column B.")
 
-    try:
-        print("🔍 Attempting to fetch real comparables...")
-        comps = get_redfin_comps(address, radius_miles=1, sold_within_days=365)
 
-        if not comps:
-            print("❌ No real comps found")
-        else:
+def _read_column_inputs(ws, col_idx):
+    """Return the row-1 address and row-3 link of a property column"""
+    # Always grab the address from row 1 (needed for Zillow too)
+    address_cell = ws.cell(row=1, column=col_idx)
+    address = str(address_cell.value).strip() if address_cell.value else ""
+
+    # Check if there's already a valid Redfin link in row 3
+    link_cell = ws.cell(row=3, column=col_idx)
+    existing_link = str(link_cell.value).strip() if link_cell.value else ""
+    return address, existing_link
+
+
+def _has_address(address):
+    return bool(address) and address.lower() != "none"
+
+
+def scrape_property(address, existing_link, concurrent: bool = CONCURRENT_BRANCHES) -> dict:
+    """Run the Redfin, Zillow and comps branches for one property.
+
+    Touches no workbook state, so it is safe to call from worker threads.
+    Returns a dict with ``link`` (None when no Redfin listing was found),
+    ``info`` (merged Redfin + Zillow fields) and ``comps``.
+    """
+    if concurrent:
+        # Zillow and comps only need the row-1 address, so they don't wait on Redfin.
+        # Each branch leases its own browser from the driver pool.
+        print("⚡ Running Redfin, Zillow and comps branches concurrently...")
+        executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="autofill")
+        redfin_future = executor.submit(_fetch_redfin_branch, address, existing_link)
+        zillow_future = executor.submit(_fetch_zillow_branch, address)
+        comps_future = executor.submit(_fetch_comps_branch, address)
+        try:
+            link, redfin_info = redfin_future.result()
+            if link is None:
+                return {"link": None, "info": {}, "comps": []}
+            try:
+                zillow_info = zillow_future.result()
+            except Exception as e:
+                print(f"❌ Zillow fetch failed: {e}")
+                zillow_info = {}
+            try:
+                comps = comps_future.result()
+            except Exception as e:
+                print(f"❌ Comp fetch failed: {e}")
+                comps = []
+        finally:
+            # The Zillow and comps branches are already running when Redfin comes back empty; wait
+            # for them so they don't keep holding pooled drivers and rate-limit tokens into the next property
+            executor.shutdown(wait=True, cancel_futures=True)
+    else:
+        link, redfin_info = _fetch_redfin_branch(address, existing_link)
+        if link is None:
+            return {"link": None, "info": {}, "comps": []}
+        try:
+            zillow_info = _fetch_zillow_branch(address)
+        except Exception as e:
+            print(f"❌ Zillow fetch failed: {e}")
+            zillow_info = {}
+        try:
+            comps = _fetch_comps_branch(address)
+        except Exception as e:
+            print(f"❌ Comp fetch failed: {e}")
+            comps = []
+
+    # Merge in a fixed order (Redfin first, Zillow wins on conflicts) regardless of which branch finished first
+    info = dict(redfin_info)
+    if zillow_info:
+        info.update(zillow_info)
+    return {"link": link, "info": info, "comps": comps}
+
+
+def _apply_property_results(ws, col_idx, col_letter, address, existing_link, result) -> bool:
+    """Write one property's scrape results into its column; False if nothing was written"""
+    link = result["link"]
+    if link is None:
+        return False
+
+    # Update the link cell only if it was empty
+    if not existing_link:
+        link_cell = ws.cell(row=3, column=col_idx)
+        link_cell.value = link
+        link_cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+        link_cell.fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
+        print(f"✅ Updated empty link cell with: {link}")
+
+    info = result["info"]
+    if not info:
+        print("⚠️ No data returned from either source.")
+        return False
+
+    print(f"🎯 Total data available: {info}")
+
+    _write_info_to_column(ws, col_idx, info)
+
+    # Continue with the rest of the function (copying from column B, saving, etc.)
+    _copy_template_column(ws, col_idx, col_letter)
+
+    comps = result["comps"]
+    if not comps:
+        print("❌ No real comps found")
+    else:
+        try:
             log_comp_buckets(address, comps)
+        except Exception as e:
+            print(f"❌ Comp logging failed: {e}")
+    return True
+
+
+def autofill_column(file_path, col_letter, concurrent: bool = CONCURRENT_BRANCHES):
+    print(f"📄 Opening workbook: {file_path}")
+    wb = load_workbook(file_path, keep_vba=True)
+    ws = wb.active
+
+    col_idx = column_index_from_string(col_letter)
+    print(f"🧩 Targeting column '{col_letter}' (index {col_idx})")
+
+    address, existing_link = _read_column_inputs(ws, col_idx)
+
+    if not is_valid_redfin_url(existing_link):
+        print("🔍 No valid link found, searching for address...")
+        if not _has_address(address):
+            print("❌ No address found in row 1")
+            return
+
+    result = scrape_property(address, existing_link, concurrent)
+    if not _apply_property_results(ws, col_idx, col_letter, address, existing_link, result):
+        return
+
+    try:
+        wb.save(file_path)
+        print("✅ File saved successfully.")
     except Exception as e:
-        print(f"❌ Comp fetch failed: {e}")
+        print(f"❌ Failed to save file: {e}")
+
+
+# ── Multi-column batch mode ───────────────────────────────────
+# Property columns start after the label (A) and template (B) columns
+FIRST_PROPERTY_COLUMN = 3
+BATCH_WORKERS = int(os.environ.get("AUTOFILL_BATCH_WORKERS", "2"))
 
+
+def parse_column_spec(ws, spec: str) -> list[str]:
+    """Expand 'C', 'C:F', 'C,E,G:H' or 'all' into a list of column letters.
+
+    'all' selects every property column with an address in row 1.
+    """
+    spec = spec.strip()
+    if spec.lower() == "all":
+        letters = []
+        for col_idx in range(FIRST_PROPERTY_COLUMN, ws.max_column + 1):
+            address, _ = _read_column_inputs(ws, col_idx)
+            if _has_address(address):
+                letters.append(get_column_letter(col_idx))
+        return letters
+
+    letters = []
+    for part in spec.split(","):
+        part = part.strip().upper()
+        if not part:
+            continue
+        if ":" in part or "-" in part:
+            first, last = re.split(r"[:-]", part, maxsplit=1)
+            first_idx = column_index_from_string(first.strip())
+            last_idx = column_index_from_string(last.strip())
+            if first_idx > last_idx:
+                first_idx, last_idx = last_idx, first_idx
+            letters.extend(get_column_letter(i) for i in range(first_idx, last_idx + 1))
+        else:
+            column_index_from_string(part)  # validate
+            letters.append(part)
+
+    # Keep the order given but drop duplicates
+    return list(dict.fromkeys(letters))
+
+
+def autofill_columns(file_path, col_spec, workers: int = BATCH_WORKERS, checkpoint_every: int = 0,
+                     concurrent: bool = CONCURRENT_BRANCHES):
+    """Autofill several columns through one loaded workbook and a single save.
+
+    Scraping runs on a bounded worker pool; all workbook writes happen on the
+    calling thread as results arrive. With ``checkpoint_every`` > 0 the
+    workbook is also saved after every N completed columns.
+    """
+    print(f"📄 Opening workbook: {file_path}")
+    wb = load_workbook(file_path, keep_vba=True)
+    ws = wb.active
+
+    columns = parse_column_spec(ws, col_spec)
+    print(f"🧩 Batch targeting {len(columns)} columns: {', '.join(columns)}")
+
+    jobs = []
+    for col_letter in columns:
+        col_idx = column_index_from_string(col_letter)
+        address, existing_link = _read_column_inputs(ws, col_idx)
+        if not is_valid_redfin_url(existing_link) and not _has_address(address):
+            print(f"⏭️ Column {col_letter}: no address in row 1 and no valid link, skipping")
+            continue
+        jobs.append((col_letter, col_idx, address, existing_link))
+
+    if not jobs:
+        print("❌ Nothing to do")
+        return
+
+    filled = 0
+    completed = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="batch") as executor:
+        futures = {
+            executor.submit(scrape_property, address, existing_link, concurrent): (col_letter, col_idx, address,
+                                                                                    existing_link)
+            for col_letter, col_idx, address, existing_link in jobs
+        }
+        for future in as_completed(futures):
+            col_letter, col_idx, address, existing_link = futures[future]
+            completed += 1
+            print(f"\n📦 Column {col_letter} finished ({completed}/{len(jobs)})")
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ Column {col_letter} failed: {e}")
+                continue
+
+            if _apply_property_results(ws, col_idx, col_letter, address, existing_link, result):
+                filled += 1
+
+            if checkpoint_every and completed % checkpoint_every == 0 and completed < len(jobs):
+                try:
+                    wb.save(file_path)
+                    print(f"💾 Checkpoint saved after {completed} columns")
+                except Exception as e:
+                    print(f"❌ Checkpoint save failed: {e}")
+
+    print(f"✅ Filled {filled}/{len(jobs)} columns.")
     try:
         wb.save(file_path)
         print("✅ File saved successfully.")
     except Exception as e:
         print(f"❌ Failed to save file: {e}")
 
-if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python autofill.py <COLUMN_LETTER> <EXCEL_PATH>")
-        sys.exit(1)
 
-    col_letter = sys.argv[1]
-    file_path = sys.argv[2]
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Autofill deal-sheet columns from Redfin and Zillow",
+        usage="python autofill.py <COLUMN_LETTER|C:F|C,E,G|all> <EXCEL_PATH> [--workers N] [--checkpoint-every N] "
+              "[--archive off|record|replay]")
+    parser.add_argument("columns", help="column letter, range (C:F), list (C,E,G) or 'all'")
+    parser.add_argument("file_path", help="path to the deal sheet (.xlsm/.xlsx)")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS,
+                        help="properties scraped in parallel in batch mode")
+    parser.add_argument("--checkpoint-every", type=int, default=0,
+                        help="save the workbook after every N completed columns in batch mode")
+    parser.add_argument("--archive", choices=("off", "record", "replay"), default=snapshot_archive.mode,
+                        help="record every fetch to the snapshot archive, or replay fetches from it")
+    args = parser.parse_args()
+    snapshot_archive.mode = args.archive
+
+    col_letter = args.columns.strip()
+    file_path = args.file_path
     print(f"🧩 Column: {col_letter}")
     print(f"📄 File:   {file_path}")
 
-    autofill_column(file_path, col_letter)
+    # 'all' is three letters too, but it selects every property column
+    if col_letter.lower() != "all" and re.fullmatch(r"[A-Za-z]{1,3}", col_letter):
+        autofill_column(file_path, col_letter)
+    else:
+        autofill_columns(file_path, col_letter, workers=args.workers, checkpoint_every=args.checkpoint_every)
+    print(f"🗺️ Geocode cache: {geocode_cache.stats}")
+    print(f"🧭 Geocoders: {geocoder_stats.summary()}")
+    print(f"🔗 Listing URL cache: {listing_url_cache.stats}")
+    print(f"🏙️ Redfin region cache: {region_cache.stats}")
+    print(f"🏘️ Sold-homes store: {sold_homes_store.stats}")
+    if snapshot_archive.mode != "off":
+        print(f"📼 Snapshot archive ({snapshot_archive.mode}): {snapshot_archive.stats}")
+    for host, host_stats in http.stats.items():
+        print(f"🌐 {host}: {host_stats}")
     print("🏁 Done.")
-
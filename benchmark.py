@@ -0,0 +1,604 @@
+"""
+Offline benchmarks for autofill.py.
+
+    python benchmark.py zillow [--pages DIR | --archive] [--runs N]
+    python benchmark.py e2e [--columns N] [--workers N] [--latency-ms MS]
+    python benchmark.py spatial [--sizes 10000,100000,1000000] [--queries N]
+
+``zillow`` times Zestimate / Rent Zestimate extraction over saved Zillow
+pages (every *.html in --pages, or every Zillow page in the snapshot
+archive with --archive) or, when neither is given, over synthetic pages
+shaped like a real listing.
+It reports per-page CPU time for the old heuristic scan versus the
+data-cache lookup and checks that both return the same values.
+
+``e2e`` starts a local stand-in for Redfin, Zillow, DuckDuckGo, Nominatim
+and the Census geocoder, points autofill at it through its base URLs, and
+runs autofill_columns over a synthetic workbook with N property columns.
+It reports p50/p95 latency per stage and per property, requests served per
+site, and browser launches. Caches start empty in a temporary directory.
+
+``spatial`` fills a SpatialIndex with N synthetic sales spread over a metro
+area (inserted incrementally in batches) and times radius + date-window
+queries through it against a full vectorized scan of the same homes.
+"""
+
+import argparse
+import contextlib
+import csv
+import functools
+import hashlib
+import io
+import json
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+from openpyxl import Workbook
+
+import autofill
+from autofill import PageSnapshot
+
+
+# ── Fixtures ─────────────────────────────────────────────────────────
+
+def _synthetic_zillow_page(zpid: int, zestimate: int, rent: int, rng: random.Random) -> str:
+    """A Zillow home-details page of realistic size and shape.
+
+    The subject sits inside the gdpClientCache JSON string of __NEXT_DATA__,
+    surrounded by nearby homes (with their own Zestimates), price history,
+    and a few hundred KB of markup and unrelated scripts.
+    """
+    nearby = [
+        {
+            "zpid": zpid + i + 1,
+            "price": rng.randrange(90_000, 600_000, 500),
+            "zestimate": rng.randrange(90_000, 600_000, 500),
+            "rentZestimate": rng.randrange(900, 3_500, 5),
+            "address": {"streetAddress": f"{rng.randint(100, 9999)} Oak St", "city": "Columbus"},
+        }
+        for i in range(40)
+    ]
+    history = [
+        {"date": f"20{10 + i % 14:02d}-0{1 + i % 9}-15", "price": rng.randrange(50_000, 500_000, 500), "event": "Sold"}
+        for i in range(60)
+    ]
+    prop = {
+        "zpid": zpid,
+        "price": zestimate + rng.randrange(-20_000, 20_000, 500),
+        "zestimate": zestimate,
+        "rentZestimate": rent,
+        "bedrooms": 3,
+        "bathrooms": 2,
+        "livingArea": 1_650,
+        "yearBuilt": 1962,
+        "description": "Charming ranch. " * 80,
+        "priceHistory": history,
+        "nearbyHomes": nearby,
+        "resoFacts": {f"fact{i}": f"value {i}" for i in range(300)},
+    }
+    cache = {f'ForSaleShopperPlatformFullRenderQuery{{"zpid":{zpid}}}': {"property": prop}}
+    next_data = {
+        "props": {"pageProps": {"componentProps": {"gdpClientCache": json.dumps(cache), "zpid": zpid}}},
+        "page": "/homedetails/[...slug]",
+    }
+
+    filler = "\n".join(
+        f'<div class="StyledCard-{i}" data-test="card-{i}"><span>${rng.randrange(90_000, 600_000, 500):,}</span>'
+        f'<p>{rng.randint(1, 5)} bd | {rng.randint(1, 4)} ba | {rng.randint(800, 3500):,} sqft</p></div>'
+        for i in range(1_500)
+    )
+    analytics = "".join(
+        f'<script>window.__cfg{i} = {json.dumps({"k": list(range(200))})};</script>' for i in range(20)
+    )
+    return (
+        "<!DOCTYPE html><html><head><title>Listing</title>"
+        f"{analytics}</head><body>"
+        f'<div id="home-details"><span data-testid="price">${prop["price"]:,}</span></div>'
+        f"{filler}"
+        f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data)}</script>'
+        "</body></html>"
+    )
+
+
+def load_zillow_pages(pages_dir, count: int, from_archive: bool = False):
+    """[(name, url, html)] from saved or archived pages, or synthetic ones"""
+    if from_archive:
+        pages = [(f"{Path(url.rstrip('/')).name}@{int(fetched_at)}", page.url, page.html)
+                 for url, fetched_at, page in autofill.snapshot_archive.iter_pages("zillow.com/homedetails")]
+        if not pages:
+            sys.exit(f"❌ No Zillow pages in the snapshot archive at {autofill.snapshot_archive.root}")
+        return pages
+    if pages_dir:
+        paths = sorted(Path(pages_dir).glob("*.html"))
+        if not paths:
+            sys.exit(f"❌ No *.html pages found in {pages_dir}")
+        return [(p.name, "", p.read_text(encoding="utf-8", errors="replace")) for p in paths]
+
+    rng = random.Random(1234)
+    pages = []
+    for i in range(count):
+        zpid = 33_000_000 + i * 97
+        html = _synthetic_zillow_page(zpid, rng.randrange(120_000, 450_000, 500), rng.randrange(1_000, 2_800, 5), rng)
+        url = f"https://www.zillow.com/homedetails/{zpid}_zpid/"
+        pages.append((f"synthetic-{zpid}", url, html))
+    return pages
+
+
+# ── Zillow extraction ────────────────────────────────────────────────
+
+def _heuristics_only(page: PageSnapshot) -> dict:
+    data = {}
+    autofill._extract_zillow_heuristics(page, data)
+    return data
+
+
+def _cpu_ms(fn, url: str, html: str, runs: int):
+    """Median CPU milliseconds of fn(fresh snapshot) over runs, plus its last result"""
+    samples = []
+    result = None
+    for _ in range(runs):
+        page = PageSnapshot(html, url)
+        start = time.process_time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = fn(page)
+        samples.append((time.process_time() - start) * 1000)
+    return statistics.median(samples), result
+
+
+def bench_zillow(args):
+    pages = load_zillow_pages(args.pages, args.count, args.archive)
+    print(f"📊 Zillow extraction: {len(pages)} page(s), {args.runs} run(s) each (median CPU ms)")
+    print(f"{'page':<28}{'KB':>8}{'before':>10}{'after':>10}{'speedup':>9}  values")
+
+    before_total = after_total = 0.0
+    mismatches = 0
+    for name, url, html in pages:
+        before_ms, before = _cpu_ms(_heuristics_only, url, html, args.runs)
+        after_ms, after = _cpu_ms(autofill.extract_zillow_data, url, html, args.runs)
+        before_total += before_ms
+        after_total += after_ms
+        agree = before == after
+        mismatches += not agree
+        speedup = before_ms / after_ms if after_ms else float("inf")
+        print(
+            f"{name[:27]:<28}{len(html) / 1024:>8.0f}{before_ms:>10.1f}{after_ms:>10.1f}{speedup:>8.1f}x"
+            f"  {'same' if agree else f'before={before} after={after}'}"
+        )
+
+    n = len(pages)
+    print(f"\n⏱️  Mean per page: before {before_total / n:.1f} ms, after {after_total / n:.1f} ms "
+          f"({before_total / after_total if after_total else float('inf'):.1f}x)")
+    if mismatches:
+        print(f"⚠️ {mismatches} page(s) returned different values (the heuristics can pick up nearby homes)")
+
+
+# ── Mock sites ───────────────────────────────────────────────────────
+
+MOCK_CENTER = (39.9612, -82.9988)
+
+
+def _address_seed(address: str) -> int:
+    return int(hashlib.sha256(autofill.normalize_address(address).encode()).hexdigest()[:12], 16)
+
+
+def mock_coordinates(address: str) -> tuple:
+    """Deterministic coordinates within ~3 miles of MOCK_CENTER for any address"""
+    seed = _address_seed(address)
+    return (MOCK_CENTER[0] + ((seed % 10_000) / 10_000 - 0.5) * 0.08,
+            MOCK_CENTER[1] + (((seed // 10_000) % 10_000) / 10_000 - 0.5) * 0.08)
+
+
+def _mock_redfin_listing(address: str, property_id: int, rng: random.Random) -> str:
+    price = rng.randrange(120_000, 400_000, 500)
+    state = {
+        "propertyId": property_id,
+        "listingPrice": price,
+        "beds": rng.randint(2, 5),
+        "baths": rng.choice([1, 1.5, 2, 2.5, 3]),
+        "sqFt": {"value": rng.randint(900, 2_800)},
+        "lotSize": rng.randint(3_000, 12_000),
+        "yearBuilt": rng.randint(1920, 2005),
+        "garageSpaces": rng.randint(0, 2),
+        "listingAgentName": "Pat Example",
+        "streetLine": address.split(",")[0],
+    }
+    filler = "".join(f'<div class="section-{i}"><p>{"Lorem ipsum " * 20}</p></div>' for i in range(400))
+    return (
+        f"<!DOCTYPE html><html><head><title>{address} | Redfin</title></head><body>"
+        f'<div data-rf-test-id="abp-price"><div class="statsValue">${price:,}</div></div>{filler}'
+        f"<script>root.__reactServerState.InitialContext = {json.dumps({'propertyInfo': state})};</script>"
+        "</body></html>"
+    )
+
+
+def _mock_sold_homes(count: int, rng: random.Random) -> list:
+    """Stingray gis homes sold within the last year, scattered around MOCK_CENTER"""
+    now_ms = int(time.time() * 1000)
+    homes = []
+    for i in range(count):
+        lat = MOCK_CENTER[0] + rng.uniform(-0.06, 0.06)
+        lng = MOCK_CENTER[1] + rng.uniform(-0.06, 0.06)
+        sqft = rng.randint(800, 2_600)
+        homes.append({
+            "propertyId": 900_000 + i,
+            "streetLine": {"value": f"{rng.randint(100, 9999)} {rng.choice(['Elm', 'Oak', 'Birch', 'Cedar'])} St"},
+            "city": "Columbus",
+            "state": "OH",
+            "zip": "43224",
+            "price": {"value": sqft * rng.randint(80, 180)},
+            "sqFt": {"value": sqft},
+            "beds": rng.randint(2, 5),
+            "baths": rng.choice([1, 1.5, 2, 3]),
+            "lotSize": {"value": rng.randint(3_000, 12_000)},
+            "soldDate": now_ms - rng.randint(1, 360) * 86_400_000,
+            "latLong": {"value": {"latitude": lat, "longitude": lng}},
+            "url": f"/OH/Columbus/home/{900_000 + i}",
+        })
+    return homes
+
+
+class MockSites:
+    """Local HTTP stand-in for every site autofill talks to, with per-site request counts.
+
+    Routes are prefixed per site (/redfin, /zillow, /zillowstatic, /ddg,
+    /nominatim, /census) so a single server can back all base URLs. Every
+    response is delayed by ``latency`` seconds to model the network.
+    """
+
+    def __init__(self, latency: float = 0.0, sold_homes: int = 400, seed: int = 7):
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.sold_homes = _mock_sold_homes(sold_homes, self.rng)
+        self.counts = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self) -> "MockSites":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def configure(self, module):
+        """Point autofill's base URLs at this server"""
+        module.REDFIN_BASE_URL = f"{self.base_url}/redfin"
+        module.ZILLOW_BASE_URL = f"{self.base_url}/zillow"
+        module.ZILLOW_AUTOCOMPLETE_URL = f"{self.base_url}/zillowstatic/autocomplete/v3/suggestions"
+        module.DDG_HTML_URL = f"{self.base_url}/ddg/html/"
+        module.NOMINATIM_URL = f"{self.base_url}/nominatim"
+        module.CENSUS_GEOCODER_URL = f"{self.base_url}/census"
+
+    def _count(self, site: str):
+        with self._lock:
+            self.counts[site] = self.counts.get(site, 0) + 1
+
+    # Responses: (status, content type, body)
+    def route(self, method: str, path: str, query: dict, body: bytes, content_type: str):
+        site, _, rest = path.lstrip("/").partition("/")
+        self._count(site)
+        q = {key: values[0] for key, values in query.items()}
+
+        if site == "redfin" and rest.startswith("stingray/do/location-autocomplete"):
+            address = q.get("location", "")
+            if address.isdigit() or "," in address and not address[0].isdigit():
+                # Zip or "City, ST": answer with a region row
+                kind = "zipcode" if address.isdigit() else "city"
+                region_id = 10_000 + _address_seed(address) % 90_000
+                path = f"/zipcode/{address}" if kind == "zipcode" else f"/city/{region_id}/OH/Columbus"
+                row = {"id": f"{2 if kind == 'zipcode' else 6}_{region_id}", "type": "2" if kind == "zipcode" else "6",
+                       "name": address, "url": path, "market": "columbus"}
+                payload = {"sections": [{"rows": [row], "name": "Places"}]}
+                return 200, "application/json", "{}&&" + json.dumps({"resultCode": 0, "payload": payload})
+            property_id = 100_000 + _address_seed(address) % 900_000
+            slug = autofill.normalize_address(address).replace(" ", "-")
+            row = {"id": f"1_{property_id}", "type": "1", "name": address, "url": f"/OH/Columbus/{slug}/home/{property_id}"}
+            payload = {"exactMatch": row, "sections": [{"rows": [row], "name": "Addresses"}]}
+            return 200, "application/json", "{}&&" + json.dumps({"resultCode": 0, "payload": payload})
+        if site == "redfin" and rest.startswith("stingray/api/gis"):
+            lat_min, lat_max = float(q.get("lat_min", -90)), float(q.get("lat_max", 90))
+            lng_min, lng_max = float(q.get("lng_min", -180)), float(q.get("lng_max", 180))
+            homes = [h for h in self.sold_homes
+                     if lat_min <= h["latLong"]["value"]["latitude"] <= lat_max
+                     and lng_min <= h["latLong"]["value"]["longitude"] <= lng_max]
+            page_size = int(q.get("num_homes", 350))
+            offset = (int(q.get("page_number", 1)) - 1) * page_size
+            homes = homes[offset:offset + page_size]
+            return 200, "application/json", "{}&&" + json.dumps({"resultCode": 0, "payload": {"homes": homes}})
+        if site == "redfin" and "/home/" in rest:
+            property_id = int(rest.rsplit("/", 1)[-1])
+            address = rest.split("/")[2].replace("-", " ") if rest.count("/") >= 3 else rest
+            return 200, "text/html", _mock_redfin_listing(address, property_id, random.Random(property_id))
+        if site == "zillowstatic":
+            zpid = 30_000_000 + _address_seed(q.get("q", "")) % 1_000_000
+            result = {"display": q.get("q", ""), "resultType": "Address", "metaData": {"zpid": zpid}}
+            return 200, "application/json", json.dumps({"results": [result]})
+        if site == "zillow" and rest.startswith("homedetails/"):
+            zpid = int(rest.split("/")[1].split("_")[0])
+            rng = random.Random(zpid)
+            html = _synthetic_zillow_page(zpid, rng.randrange(120_000, 450_000, 500), rng.randrange(1_000, 2_800, 5), rng)
+            return 200, "text/html", html
+        if site == "ddg":
+            # Only the autocomplete endpoints resolve listings; search results come back empty
+            return 200, "text/html", "<html><body><div class='no-results'>No results.</div></body></html>"
+        if site == "nominatim" and rest.startswith("reverse"):
+            return 200, "application/json", json.dumps({"address": {"city": "Columbus", "postcode": "43224"}})
+        if site == "nominatim":
+            lat, lng = mock_coordinates(q.get("q", ""))
+            return 200, "application/json", json.dumps([{"lat": str(lat), "lon": str(lng)}])
+        if site == "census" and rest.endswith("onelineaddress"):
+            lat, lng = mock_coordinates(q.get("address", ""))
+            match = {"coordinates": {"x": lng, "y": lat}}
+            return 200, "application/json", json.dumps({"result": {"addressMatches": [match]}})
+        if site == "census" and rest.endswith("addressbatch") and method == "POST":
+            message = BytesParser(policy=HTTP).parsebytes(
+                f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+            upload = next((part.get_content() for part in message.iter_parts()
+                           if part.get_param("name", header="content-disposition") == "addressFile"), b"")
+            if isinstance(upload, bytes):
+                upload = upload.decode()
+            out = io.StringIO()
+            writer = csv.writer(out)
+            for row in csv.reader(io.StringIO(upload)):
+                address = ", ".join(row[1:])
+                lat, lng = mock_coordinates(address)
+                writer.writerow([row[0], address, "Match", "Exact", address, f"{lng},{lat}", "0", "L"])
+            return 200, "text/csv", out.getvalue()
+        return 404, "text/plain", "not found"
+
+    def _handler_class(self):
+        sites = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self, method):
+                parsed = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                if sites.latency:
+                    time.sleep(sites.latency)
+                status, content_type, payload = sites.route(method, parsed.path, parse_qs(parsed.query), body,
+                                                            self.headers.get("Content-Type", ""))
+                data = payload.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._serve("GET")
+
+            def do_POST(self):
+                self._serve("POST")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+# ── End-to-end pipeline ──────────────────────────────────────────────
+
+E2E_LABELS = [
+    "asking price (PP)",
+    "sqft",
+    autofill.REDFIN_PROPERTY_TYPE_LABEL,
+    "lot size",
+    "year built",
+    "seller/agent/wholesaler/MLS",
+    "ARV estimated/appraised",
+    "market rent",
+    "price per sqft",
+]
+
+# Pipeline functions timed as stages (looked up through the module at call time)
+E2E_STAGES = {
+    "redfin url": "search_redfin_url",
+    "redfin data": "get_redfin_data",
+    "zillow url": "search_zillow_url",
+    "zillow data": "get_zillow_data",
+    "geocode": "get_coordinates_from_address",
+    "comps": "get_redfin_comps",
+    "property": "scrape_property",
+}
+
+
+def build_synthetic_workbook(path: Path, columns: int):
+    """Deal sheet with labels in A, a template column B and `columns` property addresses from C on"""
+    wb = Workbook()
+    ws = wb.active
+    for row, label in enumerate(E2E_LABELS, start=4):
+        ws.cell(row=row, column=1, value=label)
+    ws.cell(row=4 + E2E_LABELS.index("price per sqft"), column=2, value="=B4/B5")
+    for i in range(columns):
+        ws.cell(row=1, column=3 + i, value=f"{100 + i * 7} Maple Ave, Columbus, OH 43224")
+    wb.save(path)
+
+
+def _instrument(module, timings: dict):
+    """Wrap each stage function so every call's wall time lands in timings[stage]"""
+    lock = threading.Lock()
+    originals = {}
+    for stage, name in E2E_STAGES.items():
+        original = getattr(module, name)
+        originals[name] = original
+
+        @functools.wraps(original)
+        def timed(*args, __stage=stage, __original=original, **kwargs):
+            start = time.perf_counter()
+            try:
+                return __original(*args, **kwargs)
+            finally:
+                with lock:
+                    timings.setdefault(__stage, []).append(time.perf_counter() - start)
+
+        setattr(module, name, timed)
+    return originals
+
+
+def _percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def bench_e2e(args):
+    with tempfile.TemporaryDirectory(prefix="autofill-bench-") as tmp:
+        tmp = Path(tmp)
+        autofill.CACHE_DIR = str(tmp / "cache")
+        autofill.snapshot_archive.root = str(tmp / "cache" / "archive")
+        autofill.snapshot_archive.mode = "off"
+
+        sites = MockSites(latency=args.latency_ms / 1000).start()
+        sites.configure(autofill)
+        workbook = tmp / "deals.xlsx"
+        build_synthetic_workbook(workbook, args.columns)
+        last_column = autofill.get_column_letter(autofill.FIRST_PROPERTY_COLUMN + args.columns - 1)
+
+        timings = {}
+        originals = _instrument(autofill, timings)
+        launches_before = autofill.driver_pool.stats["launches"]
+        log = io.StringIO()
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(sys.stdout if args.verbose else log):
+                autofill.autofill_columns(str(workbook), f"C:{last_column}", workers=args.workers)
+        finally:
+            total = time.perf_counter() - start
+            for name, original in originals.items():
+                setattr(autofill, name, original)
+            sites.stop()
+
+        filled = sum(1 for line in log.getvalue().splitlines() if line.startswith("✅ Filled") and "fields" in line)
+
+    print(f"📊 End-to-end: {args.columns} column(s), {args.workers} worker(s), "
+          f"{args.latency_ms:.0f} ms simulated latency")
+    print(f"{'stage':<14}{'calls':>7}{'p50 ms':>10}{'p95 ms':>10}")
+    for stage in E2E_STAGES:
+        samples = timings.get(stage, [])
+        print(f"{stage:<14}{len(samples):>7}{_percentile(samples, 50) * 1000:>10.1f}{_percentile(samples, 95) * 1000:>10.1f}")
+    print(f"\n⏱️  Wall time {total:.2f} s for {args.columns} column(s), {filled} filled")
+    print(f"🌐 Requests served: {dict(sorted(sites.counts.items()))} (total {sum(sites.counts.values())})")
+    print(f"🚗 Browser launches: {autofill.driver_pool.stats['launches'] - launches_before}")
+
+
+# ── Spatial index ────────────────────────────────────────────────────
+
+def _synthetic_sales(count: int, rng: np.random.Generator, span_deg: float = 0.6) -> list:
+    """`count` sold-home rows (store column order) scattered over a span_deg square around MOCK_CENTER"""
+    lats = MOCK_CENTER[0] + rng.uniform(-span_deg / 2, span_deg / 2, count)
+    lngs = MOCK_CENTER[1] + rng.uniform(-span_deg / 2, span_deg / 2, count)
+    today = autofill.date.today().toordinal()
+    sold = [autofill.date.fromordinal(today - int(d)).isoformat() for d in rng.integers(0, 730, count)]
+    sqft = rng.integers(700, 3_000, count)
+    price = sqft * rng.integers(70, 200, count)
+    beds = rng.integers(1, 6, count)
+    return [
+        (f"id:{i}|{sold[i]}", i, f"{i} Synthetic St, Columbus, OH 43224", sold[i], int(price[i]), int(sqft[i]),
+         int(beds[i]), 2.0, 5_000, float(lats[i]), float(lngs[i]), f"/OH/Columbus/home/{i}")
+        for i in range(count)
+    ]
+
+
+def bench_spatial(args):
+    rng = np.random.default_rng(11)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    print(f"📊 Spatial index: {args.queries} queries per size, {args.radius} mi radius, {args.days} days")
+    print(f"{'homes':>9}{'build s':>9}{'search p50':>12}{'search p95':>12}{'query p50':>11}"
+          f"{'scan p50':>10}{'scan p95':>10}{'avg hits':>10}")
+
+    for size in sizes:
+        rows = _synthetic_sales(size, rng)
+        index = autofill.SpatialIndex()
+        start = time.perf_counter()
+        for offset in range(0, size, 10_000):
+            index.insert_many(rows[offset:offset + 10_000])
+        build = time.perf_counter() - start
+
+        lats = np.array([row[9] for row in rows])
+        lngs = np.array([row[10] for row in rows])
+        sold = np.array([autofill.parse_sold_date(row[3]).toordinal() for row in rows])
+        cutoff = autofill.date.today().toordinal() - args.days
+        del rows
+
+        centers = MOCK_CENTER + rng.uniform(-0.25, 0.25, (args.queries, 2))
+        search_times, query_times, scan_times, hits = [], [], [], 0
+        for lat, lng in centers:
+            start = time.perf_counter()
+            index.search(lat, lng, args.radius, args.days)
+            search_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            found = index.query(lat, lng, args.radius, args.days)
+            query_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            _, mask = autofill.filter_within_radius(lat, lng, lats, lngs, args.radius)
+            scanned = int(np.count_nonzero(mask & (sold >= cutoff)))
+            scan_times.append(time.perf_counter() - start)
+
+            if scanned != len(found):
+                print(f"⚠️ Mismatch at ({lat:.4f}, {lng:.4f}): index {len(found)} vs scan {scanned}")
+            hits += len(found)
+
+        print(f"{size:>9,}{build:>9.2f}{_percentile(search_times, 50) * 1000:>12.3f}"
+              f"{_percentile(search_times, 95) * 1000:>12.3f}{_percentile(query_times, 50) * 1000:>11.3f}"
+              f"{_percentile(scan_times, 50) * 1000:>10.3f}{_percentile(scan_times, 95) * 1000:>10.3f}"
+              f"{hits / len(centers):>10.1f}")
+    print("(ms; search = matching rows only, query = search + comp dicts, scan = full vectorized mask)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    zillow = sub.add_parser("zillow", help="Zestimate extraction: heuristics vs data cache")
+    zillow.add_argument("--pages", help="Directory of saved Zillow pages (*.html); synthetic pages if omitted")
+    zillow.add_argument("--archive", action="store_true", help="Use the Zillow pages in the snapshot archive")
+    zillow.add_argument("--count", type=int, default=10, help="Number of synthetic pages (default 10)")
+    zillow.add_argument("--runs", type=int, default=3, help="Timed runs per page (default 3)")
+    zillow.set_defaults(func=bench_zillow)
+
+    e2e = sub.add_parser("e2e", help="Full autofill_columns run against local mock sites")
+    e2e.add_argument("--columns", type=int, default=10, help="Property columns in the synthetic workbook (default 10)")
+    e2e.add_argument("--workers", type=int, default=autofill.BATCH_WORKERS, help="Batch workers")
+    e2e.add_argument("--latency-ms", type=float, default=50, help="Simulated per-request latency (default 50)")
+    e2e.add_argument("--verbose", action="store_true", help="Show autofill's own output")
+    e2e.set_defaults(func=bench_e2e)
+
+    spatial = sub.add_parser("spatial", help="SpatialIndex radius queries vs a full scan")
+    spatial.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated home counts")
+    spatial.add_argument("--queries", type=int, default=500, help="Queries per size (default 500)")
+    spatial.add_argument("--radius", type=float, default=0.5, help="Query radius in miles (default 0.5)")
+    spatial.add_argument("--days", type=int, default=365, help="Sold-within window in days (default 365)")
+    spatial.set_defaults(func=bench_spatial)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""batch_geocode_addresses against a local stand-in for the Census batch and Nominatim endpoints."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import autofill
+
+MATCHED = "1 Elm St, Columbus, OH 43224"
+UNMATCHED = "2 Nowhere Rd, Columbus, OH 43224"
+TIED = "3 Oak St, Columbus, OH 43224"
+
+# Rows come back keyed by the upload's row id, which follows the order addresses are passed in
+CENSUS_BATCH_CSV = "\n".join([
+    f'"0","{MATCHED}","Match","Exact","1 ELM ST, COLUMBUS, OH, 43224","-82.95,40.01","1","L"',
+    f'"1","{UNMATCHED}","No_Match"',
+    f'"2","{TIED}","Tie"',
+])
+NOMINATIM_ANSWERS = {TIED: [{"lat": "40.02", "lon": "-82.96"}]}
+
+
+@pytest.fixture
+def stand_in(tmp_path, monkeypatch):
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, body: str, content_type: str):
+            payload = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            requests_seen.append(("census", None))
+            self._send(CENSUS_BATCH_CSV, "text/csv")
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            query = parse_qs(parsed.query).get("q", [""])[0]
+            requests_seen.append(("nominatim", query))
+            self._send(json.dumps(NOMINATIM_ANSWERS.get(query, [])), "application/json")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    monkeypatch.setattr(autofill, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(autofill, "geocode_cache", autofill.GeocodeCache())
+    monkeypatch.setattr(autofill, "CENSUS_GEOCODER_URL", f"{base}/geocoder")
+    monkeypatch.setattr(autofill, "NOMINATIM_URL", f"{base}/nominatim")
+    yield requests_seen
+    server.shutdown()
+
+
+def test_batch_matches_unmatched_and_ties(stand_in):
+    results = autofill.batch_geocode_addresses([MATCHED, UNMATCHED, TIED])
+
+    assert results[MATCHED] == (40.01, -82.95)
+    assert results[UNMATCHED] == (None, None)
+    assert results[TIED] == (40.02, -82.96)
+    # One batch upload, then a single Nominatim lookup per address the Census could not place
+    assert stand_in.count(("census", None)) == 1
+    assert sorted(query for site, query in stand_in if site == "nominatim") == sorted([UNMATCHED, TIED])
+
+
+def test_batch_results_are_cached_including_misses(stand_in):
+    autofill.batch_geocode_addresses([MATCHED, UNMATCHED, TIED])
+    stand_in.clear()
+
+    results = autofill.batch_geocode_addresses([MATCHED, UNMATCHED, TIED])
+
+    assert results == {MATCHED: (40.01, -82.95), UNMATCHED: (None, None), TIED: (40.02, -82.96)}
+    assert stand_in == []
@@ -0,0 +1,34 @@
+"""Subject fields from a Redfin listing page whose embedded state also carries sale history."""
+import json
+
+import autofill
+
+URL = "https://www.redfin.com/OH/Columbus/123-Main-St-43224/home/555"
+
+# propertyHistory comes before aboveTheFold, so a document-order scan meets the old sale prices first
+STATE = {
+    "propertyHistory": {"events": [{"price": 90000, "eventDescription": "Sold"},
+                                   {"price": 120000, "eventDescription": "Listed"}]},
+    "aboveTheFold": {"addressSectionInfo": {"priceInfo": {"amount": 250000}, "beds": 3, "baths": 2,
+                                            "sqFt": {"value": 1500}}},
+}
+
+
+def _page(with_price_element: bool = True) -> autofill.PageSnapshot:
+    price = '<div data-rf-test-id="abp-price"><div class="statsValue">$250,000</div></div>' if with_price_element else ""
+    html = (f"<html><body>{price}"
+            f"<script>root.__reactServerState.InitialContext = {json.dumps(STATE)};</script></body></html>")
+    return autofill.PageSnapshot(html, URL)
+
+
+def test_history_prices_are_not_the_asking_price():
+    assert autofill.extract_redfin_record(_page()).price == 250000
+
+
+def test_rendered_price_wins_and_json_is_the_fallback():
+    assert autofill.extract_redfin_data(_page())["asking price (PP)"] == 250000
+    assert autofill.extract_redfin_data(_page(with_price_element=False))["asking price (PP)"] == 250000
+
+
+def test_state_assignment_is_decoded_once():
+    assert len(list(autofill.iter_embedded_json(_page().html))) == 1